@@ -1,6 +1,47 @@
-from llmclient import call_qwen
+from llmclient import call_agent
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
+from config.settings import SECTION_EXTRACTION_THRESHOLD, SECTION_CHUNK_MAX_CHARS, SECTION_EXTRACTION_WORKERS, CASCADE_MIN_CONFIDENCE
+from src.services.section_splitter import HEADER_SECTION, split_sections, chunk_section
+from src.services.skill_matcher import get_skill_matcher
+from src.services.response_parser import ResponseParseError, load_json, parse_response
+from src.graph.state import ExtractedResumeData, ResumeValidationResult, ResumeSummary
+
+
+def _reask(agent: str):
+    """Short "fix this JSON" call for parse_response, on the agent's cheapest model."""
+    return lambda user_prompt, system_instruction: call_agent(agent, user_prompt, system_instruction)
+
+
+def _accept_validation(response: str) -> bool:
+    """
+    Escalates only ambiguous verdicts. Low confidence alone is not one: the prompt
+    asks for low confidence on clear non-resumes, which must not reach the largest model.
+    """
+    validation = load_json(response, ResumeValidationResult)
+    if validation["suggested_action"] == "ask_for_more":
+        return False
+    # Verdict and action contradict each other
+    if validation["is_resume"] != (validation["suggested_action"] == "proceed"):
+        return False
+    # A positive the small model is unsure about
+    return not validation["is_resume"] or validation["confidence"] >= CASCADE_MIN_CONFIDENCE
+
+
+def _accept_extraction(response: str) -> bool:
+    load_json(response, ExtractedResumeData)
+    return True
+
+
+def _accept_section(response: str) -> bool:
+    load_json(response, ExtractedResumeData, partial=True)
+    return True
+
+
+def _accept_summary(response: str) -> bool:
+    load_json(response, ResumeSummary)
+    return True
 
 
 def agent0_validator(cv_text: str) -> Optional[Dict[str, Any]]:
@@ -47,17 +88,11 @@ def agent0_validator(cv_text: str) -> Optional[Dict[str, Any]]:
     Now inspect the user's message and produce the JSON described above.
     """
 
-    response = call_qwen(user_prompt=cv_text, system_instruction=system_prompt)
+    response = call_agent("validator", cv_text, system_prompt, accept=_accept_validation)
 
     try:
-        clean_response = response.strip()
-        if clean_response.startswith('```json'):
-            clean_response = clean_response[7:-3].strip()
-        elif clean_response.startswith('```'):
-            clean_response = clean_response[3:-3].strip()
-
-        return json.loads(clean_response)
-    except json.JSONDecodeError:
+        return parse_response(response, ResumeValidationResult, reask=_reask("validator"))
+    except ResponseParseError:
         return {
             "error": "Failed to parse LLM response as JSON",
             "raw_response": response
@@ -70,6 +105,15 @@ def agent0_validator(cv_text: str) -> Optional[Dict[str, Any]]:
 
 
 def agent1_extractor(cv_text: str) -> Optional[Dict[str, Any]]:
+    if len(cv_text) >= SECTION_EXTRACTION_THRESHOLD:
+        sections = split_sections(cv_text)
+        # Only worth it when headings were actually found
+        if len(sections) > 2:
+            extraction = _extract_by_sections(cv_text, sections)
+            if extraction is not None:
+                return _normalize_skills(extraction, cv_text)
+            # A section failed: fall back to a single completion rather than return a partial CV
+
     system_prompt = """
     You are a specialist Resume/CV extraction agent. Input: a resume or CV as plain text (or OCR text). Output: a single machine-parsable JSON object and nothing else.
 
@@ -95,6 +139,7 @@ def agent1_extractor(cv_text: str) -> Optional[Dict[str, Any]]:
       "projects": [ { "title": string | null, "description": string | null, "technologies": [string,...] | null, "period": string | null } , ... ] | null,
       "publications": [ { "title": string | null, "venue": string | null, "year": "YYYY" | null, "authors": [string,...] | null, "link": string | null } , ... ] | null,
       "technical_skills": [ { "category": string | null, "skills": [string,...] } , ... ] | null,
+      "programming_languages": [ { "language": string, "proficiency": string | null } , ... ] | null,
       "languages": [ { "language": string, "proficiency": string | null } , ... ] | null,
       "soft_skills": [ string, ... ] | null,
       "additional_information": string | null
@@ -105,7 +150,7 @@ def agent1_extractor(cv_text: str) -> Optional[Dict[str, Any]]:
     - Degrees: normalize common abbreviations when obvious (e.g., "BSc" -> "Bachelor of Science"); if uncertain, return the original short form.
     - Email: accept only valid email format; otherwise set email to null.
     - Phone number: Consider all possible phone number formats of all countries.
-    - Deduplicate equivalent skills and standardize common category names (e.g., "Databases", "Cloud", "Frameworks"); if unsure, set category to null.
+    - List skills as written in the resume; if unsure of a skill's category, set category to null.
     - Condense multi-line descriptions to 1–2 concise sentences.
     - Do NOT hallucinate or invent details. If you cannot confidently extract a field, return null for that field or section.
     - If multiple plausible candidates exist (e.g., multiple names), choose the most likely as the value. If ambiguity prevents a safe choice, return null.
@@ -120,6 +165,7 @@ def agent1_extractor(cv_text: str) -> Optional[Dict[str, Any]]:
       "projects":null,
       "publications":null,
       "technical_skills":null,
+      "programming_languages":null,
       "languages":null,
       "soft_skills":null,
       "additional_information":null
@@ -128,17 +174,12 @@ def agent1_extractor(cv_text: str) -> Optional[Dict[str, Any]]:
     Process the provided resume text and return the JSON (no Markdown-formatting) exactly following these rules.
     """
 
-    response = call_qwen(user_prompt=cv_text, system_instruction=system_prompt)
+    response = call_agent("extractor", cv_text, system_prompt, accept=_accept_extraction)
 
     try:
-        clean_response = response.strip()
-        if clean_response.startswith('```json'):
-            clean_response = clean_response[7:-3].strip()
-        elif clean_response.startswith('```'):
-            clean_response = clean_response[3:-3].strip()
-
-        return json.loads(clean_response)
-    except json.JSONDecodeError:
+        extraction = parse_response(response, ExtractedResumeData, reask=_reask("extractor"))
+        return _normalize_skills(extraction, cv_text)
+    except ResponseParseError:
         return {
             "error": "Failed to parse LLM response as JSON",
             "raw_response": response
@@ -150,6 +191,204 @@ def agent1_extractor(cv_text: str) -> Optional[Dict[str, Any]]:
         }
 
 
+def _normalize_skills(extraction: Dict[str, Any], cv_text: str) -> Dict[str, Any]:
+    """
+    Canonicalizes, deduplicates and categorizes the returned skills locally.
+    Only the detected Skills section is scanned for extra skills: names, author
+    initials and semester names elsewhere in a CV look like skills ("Julia", "R.", "Spring").
+    """
+    if not isinstance(extraction, dict) or extraction.get("error"):
+        return extraction
+    skills_text = split_sections(cv_text).get("skills")
+    return get_skill_matcher().normalize_extraction(extraction, skills_text)
+
+
+SECTION_FIELD_SCHEMAS = {
+    "full_name": '"full_name": string | null',
+    "email": '"email": string | null',
+    "phone_number": '"phone_number": string | null',
+    "education": '''"education": [ { "degree": string | null, "field": string | null, "institution": string | null,
+                     "start_date": "YYYY-MM" | "YYYY" | null, "end_date": "YYYY-MM" | "YYYY" | "present" | null,
+                     "grade": string | null } , ... ] | null''',
+    "employment_details": '''"employment_details": [ { "title": string | null, "company": string | null,
+                             "start_date": "YYYY-MM" | "YYYY" | null, "end_date": "YYYY-MM" | "YYYY" | "present" | null,
+                             "location": string | null, "description": string | null } , ... ] | null''',
+    "projects": '"projects": [ { "title": string | null, "description": string | null, "technologies": [string,...] | null, "period": string | null } , ... ] | null',
+    "publications": '"publications": [ { "title": string | null, "venue": string | null, "year": "YYYY" | null, "authors": [string,...] | null, "link": string | null } , ... ] | null',
+    "technical_skills": '"technical_skills": [ { "category": string | null, "skills": [string,...] } , ... ] | null',
+    "programming_languages": '"programming_languages": [ { "language": string, "proficiency": string | null } , ... ] | null',
+    "languages": '"languages": [ { "language": string, "proficiency": string | null } , ... ] | null',
+    "soft_skills": '"soft_skills": [ string, ... ] | null',
+    "additional_information": '"additional_information": string | null',
+}
+
+# Section name -> (fields extracted from it, short extraction focus for the prompt)
+SECTION_EXTRACTION_FIELDS = {
+    HEADER_SECTION: (["full_name", "email", "phone_number"],
+                     "the candidate's contact header"),
+    "education": (["education"],
+                  "the Education section. Return one entry per degree."),
+    "experience": (["employment_details"],
+                   "the Experience / Work history section. Return one entry per position."),
+    "publications": (["publications"],
+                     "the Publications section. Return one entry per publication, in the order listed."),
+    "projects": (["projects"],
+                 "the Projects section. Return one entry per project."),
+    "skills": (["technical_skills", "programming_languages", "soft_skills"],
+               "the Skills section"),
+    "languages": (["languages"],
+                  "the Languages section (spoken languages only)"),
+    "other": (["additional_information", "soft_skills"],
+              "the remaining sections (summary, certifications, awards, interests). Condense additional_information to 1-3 sentences."),
+}
+
+# Fields used to recognise the same entry returned by different sections/chunks
+_DEDUP_KEYS = {
+    "education": ("degree", "institution", "start_date"),
+    "employment_details": ("title", "company", "start_date"),
+    "projects": ("title",),
+    "publications": ("title",),
+    "programming_languages": ("language",),
+    "languages": ("language",),
+}
+
+_HEADER_FALLBACK_CHARS = 1500
+
+
+def _section_prompt(fields: List[str], focus: str) -> str:
+    schema = ",\n      ".join(SECTION_FIELD_SCHEMAS[field] for field in fields)
+    return f"""
+    You are a specialist Resume/CV extraction agent. Input: one part of a longer resume or CV. Focus: {focus}.
+    Output: a single machine-parsable JSON object and nothing else.
+
+    OUTPUT RULES
+    - Return ONLY valid JSON (no prose, no Markdown, no explanations).
+    - The top-level object MUST contain only these keys: {", ".join(fields)}
+    - If a field is not found in this part, set its value to null.
+
+    SCHEMA (types)
+    {{
+      {schema}
+    }}
+
+    NORMALIZATION & BEHAVIOR
+    - Dates: normalize to "YYYY-MM" when month known, otherwise "YYYY". Use "present" for ongoing roles.
+    - Degrees: normalize common abbreviations when obvious (e.g., "BSc" -> "Bachelor of Science"); if uncertain, return the original short form.
+    - Email: accept only valid email format; otherwise set email to null.
+    - Condense multi-line descriptions to 1–2 concise sentences.
+    - Do NOT hallucinate or invent details. If you cannot confidently extract a field, return null.
+
+    Process the provided text and return the JSON (no Markdown-formatting) exactly following these rules.
+    """
+
+
+def _extract_section(fields: List[str], focus: str, text: str) -> Optional[Dict[str, Any]]:
+    response = call_agent("extractor", text, _section_prompt(fields, focus),
+                          accept=_accept_section)
+
+    try:
+        parsed = parse_response(response, ExtractedResumeData, reask=_reask("extractor"), partial=True)
+    except ResponseParseError:
+        return None
+
+    return {field: parsed.get(field) for field in fields}
+
+
+def _entry_key(field: str, entry: Any) -> str:
+    if isinstance(entry, dict) and field in _DEDUP_KEYS:
+        values = [entry.get(key) for key in _DEDUP_KEYS[field]]
+        if any(values):
+            return json.dumps([str(v).strip().lower() if v else None for v in values])
+    if isinstance(entry, str):
+        return entry.strip().lower()
+    return json.dumps(entry, sort_keys=True)
+
+
+def _merge_technical_skills(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    seen: Dict[str, set] = {}
+    for group in groups:
+        if not isinstance(group, dict):
+            continue
+        category = group.get("category")
+        key = (category or "").strip().lower()
+        if key not in merged:
+            merged[key] = {"category": category, "skills": []}
+            seen[key] = set()
+        for skill in group.get("skills") or []:
+            if isinstance(skill, str) and skill.strip().lower() not in seen[key]:
+                seen[key].add(skill.strip().lower())
+                merged[key]["skills"].append(skill.strip())
+    return [group for group in merged.values() if group["skills"]]
+
+
+def merge_extraction_results(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merges partial section extractions into one ExtractedResumeData dict.
+    Scalars keep the first non-null value, lists are concatenated and deduplicated.
+    Args:
+        partials: Partial results, in document order
+    Returns:
+        Merged extraction result with every ExtractedResumeData key present
+    """
+    merged: Dict[str, Any] = {field: None for field in SECTION_FIELD_SCHEMAS}
+
+    for field in SECTION_FIELD_SCHEMAS:
+        values = [partial[field] for partial in partials if partial.get(field) is not None]
+
+        if field == "additional_information":
+            texts = []
+            for value in values:
+                if isinstance(value, str) and value.strip() and value.strip() not in texts:
+                    texts.append(value.strip())
+            merged[field] = " ".join(texts) or None
+        elif field == "technical_skills":
+            groups = [group for value in values if isinstance(value, list) for group in value]
+            merged[field] = _merge_technical_skills(groups) or None
+        elif any(isinstance(value, list) for value in values):
+            entries = []
+            seen = set()
+            for value in values:
+                for entry in value if isinstance(value, list) else [value]:
+                    key = _entry_key(field, entry)
+                    if key not in seen:
+                        seen.add(key)
+                        entries.append(entry)
+            merged[field] = entries or None
+        elif values:
+            merged[field] = values[0]
+
+    return merged
+
+
+def _extract_by_sections(cv_text: str, sections: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Extracts a long CV section by section, running section prompts concurrently.
+    Args:
+        cv_text: Full CV text
+        sections: Output of split_sections(cv_text)
+    Returns:
+        Merged extraction result, or None if any section or chunk failed
+    """
+    # Contact details usually sit at the very top; make sure the header prompt sees them
+    if HEADER_SECTION not in sections:
+        sections = {HEADER_SECTION: cv_text[:_HEADER_FALLBACK_CHARS], **sections}
+
+    tasks = []
+    for name, text in sections.items():
+        fields, focus = SECTION_EXTRACTION_FIELDS[name]
+        for chunk in chunk_section(text, SECTION_CHUNK_MAX_CHARS):
+            tasks.append((fields, focus, chunk))
+
+    with ThreadPoolExecutor(max_workers=max(1, SECTION_EXTRACTION_WORKERS)) as executor:
+        results = list(executor.map(lambda task: _extract_section(*task), tasks))
+
+    if any(result is None for result in results):
+        return None
+
+    return merge_extraction_results(results)
+
+
 def agent2_summarizer(cv_text: str) -> Optional[str]:
     system_prompt = """
     You are a resume summarization agent. Input: a resume or CV as plain text. Output: a single machine-parsable JSON object with a brief summary.
@@ -169,18 +408,11 @@ def agent2_summarizer(cv_text: str) -> Optional[str]:
     Process the provided resume text and return the JSON exactly following these rules.
     """
 
-    response = call_qwen(user_prompt=cv_text, system_instruction=system_prompt)
+    response = call_agent("summarizer", cv_text, system_prompt, accept=_accept_summary)
 
     try:
-        clean_response = response.strip()
-        if clean_response.startswith('```json'):
-            clean_response = clean_response[7:-3].strip()
-        elif clean_response.startswith('```'):
-            clean_response = clean_response[3:-3].strip()
-
-        parsed = json.loads(clean_response)
-        return parsed.get("summary", None)
-    except json.JSONDecodeError:
+        return parse_response(response, ResumeSummary, reask=_reask("summarizer"))["summary"]
+    except ResponseParseError:
         return None
     except Exception as e:
         return None
@@ -198,6 +430,6 @@ def custom_summarizer(cv_text: str, parameters: List[str]) -> Optional[str]:
     - Do not hallucinate or invent details. Base strictly on the provided resume text.
     """
 
-    response = call_qwen(user_prompt=cv_text, system_instruction=system_prompt)
+    response = call_agent("custom_summarizer", cv_text, system_prompt)
 
     return response.strip() if response else None
\ No newline at end of file
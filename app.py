@@ -3,6 +3,8 @@ import os
 import tempfile
 from src.workflow import ResumeProcessingWorkflow
 from agents import custom_summarizer
+from config.settings import CANDIDATE_STORE_PATH
+from src.services.candidate_store import CandidateStore
 import pprint
 import datetime
 import time
@@ -61,6 +63,12 @@ def main():
                 # Сохраняем результат в session state
                 st.session_state.processing_result = result
 
+                # Сохраняем извлеченные данные в хранилище кандидатов
+                extraction = result.get("extraction_result")
+                if CANDIDATE_STORE_PATH and extraction and not extraction.get("error"):
+                    with CandidateStore(CANDIDATE_STORE_PATH) as store:
+                        store.add(extraction, source=uploaded_file.name)
+
                 # Очистка
                 os.remove(file_path)
 
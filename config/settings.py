@@ -0,0 +1,46 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Section-segmented extraction: CVs at least this long (in characters) are split
+# into sections that are extracted concurrently instead of in one completion.
+SECTION_EXTRACTION_THRESHOLD = int(os.getenv("SECTION_EXTRACTION_THRESHOLD", "12000"))
+SECTION_CHUNK_MAX_CHARS = int(os.getenv("SECTION_CHUNK_MAX_CHARS", "6000"))
+SECTION_EXTRACTION_WORKERS = int(os.getenv("SECTION_EXTRACTION_WORKERS", "6"))
+
+# SQLite candidate store; extraction results are persisted there when set
+CANDIDATE_STORE_PATH = os.getenv("CANDIDATE_STORE_PATH")
+
+# Skill dictionary (aliases -> canonical name -> category) used to normalize technical_skills
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json")
+)
+
+# Per-agent model cascade: comma-separated models, cheapest first, e.g.
+# LLM_MODELS_VALIDATOR="gpt-4o-mini,gpt-4o". Empty means DEFULT_COMET_MODEL only.
+AGENT_MODELS = {
+    agent: [model.strip() for model in os.getenv(f"LLM_MODELS_{agent.upper()}", "").split(",") if model.strip()]
+    for agent in ("validator", "extractor", "summarizer", "custom_summarizer")
+}
+# Validator cascade: a resume verdict below this confidence is treated as ambiguous and escalated
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7"))
+
+# JSON list of OpenAI-compatible endpoints, e.g.
+# [{"name": "local", "base_url": "http://127.0.0.1:8000/v1", "api_key": "stub", "models": ["qwen"]}]
+# ("api_key_env" reads the key from another variable). Empty means the Comet endpoint only.
+LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS", "")
+ROUTER_EWMA_ALPHA = float(os.getenv("ROUTER_EWMA_ALPHA", "0.2"))
+# Seconds an endpoint is moved to the back of the queue after a failure
+ROUTER_FAILURE_COOLDOWN = float(os.getenv("ROUTER_FAILURE_COOLDOWN", "30"))
+
+# Hedged requests: when a call outlives the HEDGE_PERCENTILE latency of recent calls,
+# a duplicate is sent (to the next-best endpoint when there is one) and the first answer wins
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+# Upper bound on the share of recent calls that may be hedged
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.05"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
@@ -1,9 +1,19 @@
 import os
-from typing import Optional, Any
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Optional, Any, Callable, Dict, List
 from dotenv import load_dotenv
 from openai import RateLimitError, APIConnectionError, APIStatusError
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
+from config.settings import (
+    AGENT_MODELS, LLM_ENDPOINTS, ROUTER_EWMA_ALPHA, ROUTER_FAILURE_COOLDOWN,
+    LLM_HEDGING, HEDGE_PERCENTILE, HEDGE_MAX_RATE, HEDGE_WINDOW, HEDGE_MIN_SAMPLES,
+)
 
 load_dotenv()
 
@@ -19,31 +29,358 @@ COMETAPI_BASE_URL: str = os.getenv("COMETAPI_BASE_URL", "https://api.cometapi.co
 
 
 
-API_NOT_INITIALIZED_ERROR = "[ОШИБКА API] Клиент OpenRouter не инициализирован."
-API_RATE_LIMIT_ERROR = "[ОШИБКА API] Превышен лимит запросов к API."
-API_CONNECTION_ERROR = "[ОШИБКА API] Не удалось подключиться к API."
-API_GENERAL_ERROR = "[ОШИБКА API] Произошла ошибка при обращении к API."
+API_ERROR_PREFIX = "[ОШИБКА API]"
+API_NOT_INITIALIZED_ERROR = f"{API_ERROR_PREFIX} Клиент OpenRouter не инициализирован."
+API_RATE_LIMIT_ERROR = f"{API_ERROR_PREFIX} Превышен лимит запросов к API."
+API_CONNECTION_ERROR = f"{API_ERROR_PREFIX} Не удалось подключиться к API."
+API_GENERAL_ERROR = f"{API_ERROR_PREFIX} Произошла ошибка при обращении к API."
 
 
-def call_llm(prompt_text, system_instruction = "", model = DEFAULT_COMET_MODEL, temperature = 0):
-    if not COMET_API_KEY:
-        return API_NOT_INITIALIZED_ERROR
+def is_api_error(response: Optional[str]) -> bool:
+    return not response or response.startswith(API_ERROR_PREFIX)
 
+
+class Endpoint:
+    """An OpenAI-compatible endpoint with EWMA latency / error-rate statistics."""
+
+    def __init__(self, name: str, base_url: str, api_key: str, models: Optional[List[str]] = None):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.models = models or []
+        self.calls = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.failed_at = 0.0
+        self._clients: Dict[Any, ChatOpenAI] = {}
+
+    def serves(self, model: str) -> bool:
+        return not self.models or model in self.models
+
+    def client(self, model: str, temperature: float, retry: bool = True) -> ChatOpenAI:
+        """
+        Args:
+            retry: Keep the OpenAI client's retries on 429/5xx/connection errors;
+                disabled when another endpoint can take over instead
+        """
+        key = (model, temperature, retry)
+        if key not in self._clients:
+            options = {} if retry else {"max_retries": 0}
+            self._clients[key] = ChatOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                model=model,
+                temperature=temperature,
+                **options,
+            )
+        return self._clients[key]
+
+    def record(self, latency: float, ok: bool, alpha: float) -> None:
+        self.calls += 1
+        if ok:
+            self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+        else:
+            self.failures += 1
+            self.failed_at = time.monotonic()
+        self.error_rate = alpha * (0.0 if ok else 1.0) + (1 - alpha) * self.error_rate
+
+    def record_cancelled(self, elapsed: float, alpha: float) -> None:
+        """A cancelled (hedged-out) call took at least `elapsed`, so it can only raise the latency estimate."""
+        self.cancelled += 1
+        if self.latency is None:
+            self.latency = elapsed
+        elif elapsed > self.latency:
+            self.latency = alpha * elapsed + (1 - alpha) * self.latency
+
+    def score(self, now: float, cooldown: float) -> float:
+        """Lower is better: expected latency inflated by the error rate."""
+        if self.latency is None:
+            # Not measured yet: try it before known-slow endpoints
+            score = 0.0
+        else:
+            score = self.latency / max(1e-6, 1.0 - self.error_rate)
+        if self.failed_at and now - self.failed_at < cooldown:
+            score += 1e6
+        return score
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "calls": self.calls,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+            "ewma_latency": self.latency,
+            "ewma_error_rate": self.error_rate,
+        }
+
+
+class EndpointRouter:
+    """Picks endpoints by observed latency and error rate, failing over on errors."""
+
+    def __init__(self, endpoints: List[Endpoint], alpha: float = ROUTER_EWMA_ALPHA,
+                 cooldown: float = ROUTER_FAILURE_COOLDOWN):
+        self.endpoints = endpoints
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def ranked(self, model: str) -> List[Endpoint]:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self.endpoints if endpoint.serves(model)]
+            return sorted(candidates, key=lambda endpoint: endpoint.score(now, self.cooldown))
+
+    def invoke(self, model: str, messages: List[Any], temperature: float = 0) -> str:
+        """
+        Sends messages to the best endpoint serving the model, trying the next one on failure.
+        Raises:
+            The last endpoint error if every endpoint failed
+        """
+        endpoints = self.ranked(model)
+        if not endpoints:
+            raise ValueError(f"No endpoint serves model {model!r}")
+
+        # Failover to the next endpoint replaces client-side retries; a lone endpoint keeps them
+        retry = len(endpoints) == 1
+        last_error: Optional[Exception] = None
+        for endpoint in endpoints:
+            started = time.monotonic()
+            try:
+                response = endpoint.client(model, temperature, retry).invoke(messages)
+            except Exception as e:
+                with self._lock:
+                    endpoint.record(time.monotonic() - started, False, self.alpha)
+                last_error = e
+                continue
+            with self._lock:
+                endpoint.record(time.monotonic() - started, True, self.alpha)
+            return response.content.strip()
+
+        raise last_error
+
+    async def ainvoke(self, model: str, messages: List[Any], temperature: float = 0, offset: int = 0) -> str:
+        """
+        Async variant of invoke(); cancelling it aborts the in-flight HTTP request.
+        Args:
+            offset: Start from the offset-th ranked endpoint, so a hedge goes elsewhere
+        """
+        endpoints = self.ranked(model)
+        if not endpoints:
+            raise ValueError(f"No endpoint serves model {model!r}")
+        offset %= len(endpoints)
+        endpoints = endpoints[offset:] + endpoints[:offset]
+
+        retry = len(endpoints) == 1
+        last_error: Optional[Exception] = None
+        for endpoint in endpoints:
+            started = time.monotonic()
+            try:
+                response = await endpoint.client(model, temperature, retry).ainvoke(messages)
+            except asyncio.CancelledError:
+                # Lost a hedge race: a stalled endpoint must still be penalized
+                with self._lock:
+                    endpoint.record_cancelled(time.monotonic() - started, self.alpha)
+                raise
+            except Exception as e:
+                with self._lock:
+                    endpoint.record(time.monotonic() - started, False, self.alpha)
+                last_error = e
+                continue
+            with self._lock:
+                endpoint.record(time.monotonic() - started, True, self.alpha)
+            return response.content.strip()
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {endpoint.name: endpoint.stats() for endpoint in self.endpoints}
+
+
+def _load_endpoints() -> List[Endpoint]:
+    if not LLM_ENDPOINTS:
+        if not COMET_API_KEY:
+            return []
+        return [Endpoint("comet", COMETAPI_BASE_URL, COMET_API_KEY)]
+
+    endpoints = []
+    for index, config in enumerate(json.loads(LLM_ENDPOINTS)):
+        api_key = config.get("api_key") or os.getenv(config.get("api_key_env", ""), "")
+        if not api_key:
+            continue
+        endpoints.append(Endpoint(
+            name=config.get("name", f"endpoint{index}"),
+            base_url=config["base_url"],
+            api_key=api_key,
+            models=config.get("models"),
+        ))
+    return endpoints
+
+
+_router: Optional[EndpointRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> EndpointRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = EndpointRouter(_load_endpoints())
+        return _router
+
+
+def configure_endpoints(endpoints: List[Dict[str, Any]]) -> EndpointRouter:
+    """
+    Replaces the routed endpoints, e.g. with local stub servers.
+    Args:
+        endpoints: Dicts with name, base_url, api_key and optional models
+    Returns:
+        The new router
+    """
+    global _router
+    with _router_lock:
+        _router = EndpointRouter([
+            Endpoint(config.get("name", f"endpoint{index}"), config["base_url"],
+                     config.get("api_key", "stub"), config.get("models"))
+            for index, config in enumerate(endpoints)
+        ])
+        return _router
+
+
+class HedgingPolicy:
+    """Tracks recent call latencies and decides when to fire a duplicate (hedge) request."""
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, max_rate: float = HEDGE_MAX_RATE,
+                 window: int = HEDGE_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._hedged = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+            index = max(0, math.ceil(self.percentile / 100 * len(latencies)) - 1)
+            return latencies[index]
+
+    def try_fire(self) -> bool:
+        """Counts a hedge unless that would push the recent hedge rate over max_rate."""
+        with self._lock:
+            if (sum(self._hedged) + 1) / (len(self._hedged) + 1) > self.max_rate:
+                return False
+            self.hedges_fired += 1
+            return True
+
+    def record(self, latency: float, hedged: bool, hedge_won: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(latency)
+            self._hedged.append(hedged)
+            if hedge_won:
+                self.hedges_won += 1
+
+    def stats(self) -> Dict[str, Any]:
+        threshold = self.delay()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "hedge_delay": threshold,
+            }
+
+
+_hedging_policies: Dict[str, HedgingPolicy] = {}
+_hedging_lock = threading.Lock()
+
+
+def get_hedging_policy(model: str) -> HedgingPolicy:
+    """Hedging policy of a model; models differ too much in latency to share one percentile."""
+    with _hedging_lock:
+        if model not in _hedging_policies:
+            _hedging_policies[model] = HedgingPolicy()
+        return _hedging_policies[model]
+
+
+def hedging_stats() -> Dict[str, Dict[str, Any]]:
+    with _hedging_lock:
+        policies = dict(_hedging_policies)
+    return {model: policy.stats() for model, policy in policies.items()}
+
+_hedge_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_hedge_loop() -> asyncio.AbstractEventLoop:
+    """A background event loop, so hedged calls work from any (sync) caller thread."""
+    global _hedge_loop
+    with _router_lock:
+        if _hedge_loop is None:
+            _hedge_loop = asyncio.new_event_loop()
+            threading.Thread(target=_hedge_loop.run_forever, name="llm-hedging", daemon=True).start()
+        return _hedge_loop
+
+
+async def _hedged_invoke(router: EndpointRouter, model: str, messages: List[Any], temperature: float,
+                         policy: HedgingPolicy) -> str:
+    started = time.monotonic()
+    delay = policy.delay()
+
+    primary = asyncio.ensure_future(router.ainvoke(model, messages, temperature))
+    hedge = None
+    pending = {primary}
+    try:
+        if delay is not None:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and policy.try_fire():
+                hedge = asyncio.ensure_future(router.ainvoke(model, messages, temperature, offset=1))
+                pending.add(hedge)
+            pending |= done
+
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    policy.record(time.monotonic() - started, hedge is not None, task is hedge)
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        # The loser is cancelled, which closes its HTTP request and records its elapsed time
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def call_llm(prompt_text, system_instruction = "", model = DEFAULT_COMET_MODEL, temperature = 0, hedge = None):
     try:
-        llm = ChatOpenAI(
-            base_url=COMETAPI_BASE_URL,
-            api_key=COMET_API_KEY,
-            model=model,
-            temperature=temperature,
-        )
+        router = get_router()
+        if not router.endpoints:
+            return API_NOT_INITIALIZED_ERROR
 
         messages = []
         if system_instruction:
             messages.append(SystemMessage(content=system_instruction))
         messages.append(HumanMessage(content=prompt_text))
 
-        response = llm.invoke(messages)
-        return response.content.strip()
+        if LLM_HEDGING if hedge is None else hedge:
+            future = asyncio.run_coroutine_threadsafe(
+                _hedged_invoke(router, model, messages, temperature, get_hedging_policy(model)), _get_hedge_loop()
+            )
+            return future.result()
+
+        return router.invoke(model, messages, temperature)
 
     except RateLimitError:
         return API_RATE_LIMIT_ERROR
@@ -55,6 +392,49 @@ def call_llm(prompt_text, system_instruction = "", model = DEFAULT_COMET_MODEL,
         return f"{API_GENERAL_ERROR} {e}"
 
 
+cascade_stats: Dict[str, Dict[str, int]] = {}
+_cascade_lock = threading.Lock()
+
+
+def call_agent(agent: str, user_prompt: str, system_instruction: str = "",
+               accept: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Calls the agent's model cascade (LLM_MODELS_<AGENT>), cheapest model first.
+    A response is escalated to the next model when it is an API error or accept() rejects it;
+    the last model's response is returned as is.
+    Args:
+        agent: Agent name, e.g. "validator"
+        user_prompt: User message
+        system_instruction: System prompt
+        accept: Predicate on the raw response (valid JSON, enough confidence...)
+    Returns:
+        The accepted (or last) response text
+    """
+    models = AGENT_MODELS.get(agent) or [DEFAULT_COMET_MODEL]
+
+    response = API_NOT_INITIALIZED_ERROR
+    for index, model in enumerate(models):
+        response = call_llm(user_prompt, system_instruction=system_instruction, model=model)
+
+        with _cascade_lock:
+            stats = cascade_stats.setdefault(agent, {"calls": 0, "escalations": 0})
+            stats["calls"] += 1
+
+        if index == len(models) - 1:
+            break
+        try:
+            accepted = not is_api_error(response) and (accept is None or accept(response))
+        except Exception:
+            accepted = False
+        if accepted:
+            break
+
+        with _cascade_lock:
+            stats["escalations"] += 1
+
+    return response
+
+
 def call_qwen(user_prompt, system_instruction = ''):
     return call_llm(
         prompt_text=user_prompt,
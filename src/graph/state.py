@@ -50,6 +50,9 @@ class ResumeValidationResult(TypedDict):
     suggested_action: Literal["proceed", "ask_for_more", "reject"]
     excerpt: str
 
+class ResumeSummary(TypedDict):
+    summary: str
+
 class ExtractedResumeData(TypedDict):
     full_name: Optional[str]
     email: Optional[str]
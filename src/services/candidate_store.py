@@ -0,0 +1,525 @@
+import datetime
+import json
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.graph.state import ExtractedResumeData
+from src.services.skill_matcher import get_skill_matcher
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT,
+    email TEXT,
+    phone_number TEXT,
+    -- Experience as of insertion; when a position is ongoing (experience_open = 1) it keeps
+    -- growing and is (current month - experience_start) instead, so both stay indexable
+    experience_months INTEGER NOT NULL DEFAULT 0,
+    experience_open INTEGER NOT NULL DEFAULT 0,
+    experience_start INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates (experience_open, experience_months DESC);
+CREATE INDEX IF NOT EXISTS idx_candidates_experience_start ON candidates (experience_open, experience_start);
+CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates (email);
+
+CREATE TABLE IF NOT EXISTS education (
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    degree TEXT,
+    field TEXT,
+    institution TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    grade TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_education_candidate ON education (candidate_id);
+
+CREATE TABLE IF NOT EXISTS employment (
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    title TEXT,
+    company TEXT,
+    company_key TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    location TEXT,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_employment_candidate ON employment (candidate_id);
+CREATE INDEX IF NOT EXISTS idx_employment_company ON employment (company_key, candidate_id);
+
+-- Inverted indexes: term -> candidate ids
+CREATE TABLE IF NOT EXISTS skills (
+    skill_key TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    skill TEXT NOT NULL,
+    category TEXT,
+    PRIMARY KEY (skill_key, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_skills_candidate ON skills (candidate_id);
+
+CREATE TABLE IF NOT EXISTS languages (
+    language_key TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    language TEXT NOT NULL,
+    proficiency TEXT,
+    PRIMARY KEY (language_key, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_languages_candidate ON languages (candidate_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5 (
+    full_name, skills, companies, titles, body
+);
+"""
+
+# Query term prefixes routing a term to a specific inverted index
+_TERM_TABLES = {
+    "skill": ("skills", "skill_key"),
+    "company": ("employment", "company_key"),
+    "language": ("languages", "language_key"),
+    "lang": ("languages", "language_key"),
+}
+
+_EXPERIENCE_CLAUSE = re.compile(r"^(>=|<=|>|<|=)?\s*(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?|y)$", re.IGNORECASE)
+_TEXT_CLAUSE = re.compile(r"^text\s*:\s*(.+)$", re.IGNORECASE | re.DOTALL)
+_FTS_TOKEN = re.compile(r'"[^"]*"?|[^\s"]+')
+_FTS_OPERATORS = ("AND", "OR", "NOT")
+_AND = re.compile(r"\s+AND\s+", re.IGNORECASE)
+_OR = re.compile(r"\s+OR\s+", re.IGNORECASE)
+
+_PRESENT = ("present", "current", "now", "ongoing")
+
+
+def normalize_term(value: str) -> str:
+    """Lower-cases and collapses whitespace so index lookups are case-insensitive."""
+    return " ".join(value.lower().split())
+
+
+def current_month() -> int:
+    today = datetime.date.today()
+    return today.year * 12 + today.month - 1
+
+
+def _parse_month(value: Optional[str], is_end: bool) -> Optional[int]:
+    """Converts "YYYY-MM" / "YYYY" / "present" into a month ordinal."""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    if value in _PRESENT:
+        return current_month()
+
+    match = re.match(r"^(\d{4})(?:-(\d{1,2}))?", value)
+    if not match:
+        return None
+    year = int(match.group(1))
+    if match.group(2):
+        month = int(match.group(2))
+    else:
+        month = 12 if is_end else 1
+    return year * 12 + month - 1
+
+
+def experience_months(employment: Optional[List[Dict[str, Any]]]) -> int:
+    """
+    Computes total experience in months from employment entries, merging overlapping periods.
+    Args:
+        employment: employment_details of an extraction result
+    Returns:
+        Number of months covered by at least one position, as of the current month
+    """
+    return _experience(employment)[0]
+
+
+def _experience(employment: Optional[List[Dict[str, Any]]]) -> Tuple[int, bool]:
+    """Returns (experience months as of now, whether a position is ongoing)."""
+    ongoing = False
+    intervals = []
+    for entry in employment or []:
+        if not isinstance(entry, dict):
+            continue
+        start = _parse_month(entry.get("start_date"), is_end=False)
+        end = _parse_month(entry.get("end_date"), is_end=True)
+        if start is None:
+            continue
+        if str(entry.get("end_date") or "").strip().lower() in _PRESENT:
+            ongoing = True
+        if end is None:
+            end = start
+        if end >= start:
+            intervals.append((start, end + 1))
+
+    total = 0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total, ongoing
+
+
+def fts_query(text: str) -> str:
+    """
+    Turns free text into a safe FTS5 expression: every term becomes a quoted phrase
+    ("node.js", "c++"), so punctuation is never read as FTS5 syntax. Upper-case
+    AND / OR / NOT between terms, "quoted phrases" and a trailing * for prefixes are kept.
+    """
+    parts: List[str] = []
+    for token in _FTS_TOKEN.findall(text):
+        if token in _FTS_OPERATORS:
+            if parts and parts[-1] not in _FTS_OPERATORS:
+                parts.append(token)
+            continue
+        prefix = token.endswith("*") and not token.startswith('"')
+        phrase = token.strip('"*').strip()
+        if not phrase:
+            continue
+        if parts and parts[-1] not in _FTS_OPERATORS:
+            parts.append("AND")
+        parts.append('"' + phrase.replace('"', '""') + '"' + ("*" if prefix else ""))
+    while parts and parts[-1] in _FTS_OPERATORS:
+        parts.pop()
+    return " ".join(parts)
+
+
+def parse_query(query: str) -> Tuple[List[List[Tuple[str, str]]], Optional[Tuple[str, float]], Optional[str]]:
+    """
+    Parses a search query such as "Python AND Kubernetes, >3 years".
+    Comma-separated clauses are combined with AND. Inside a clause, AND binds
+    terms and OR lists alternatives for a single term ("Go OR Rust AND Docker");
+    both operators are case-insensitive.
+    Terms may be prefixed with skill:, company: or language: (default skill:).
+    A "text: ..." clause searches names, skills, companies, titles and descriptions
+    (see fts_query).
+    Args:
+        query: Query string
+    Returns:
+        (list of AND-ed term groups, each a list of OR-ed (kind, term) pairs;
+         optional (operator, years) experience constraint; optional FTS5 expression)
+    """
+    groups: List[List[Tuple[str, str]]] = []
+    experience = None
+    texts: List[str] = []
+
+    for clause in query.split(","):
+        clause = clause.strip()
+        if not clause:
+            continue
+
+        match = _EXPERIENCE_CLAUSE.match(clause)
+        if match:
+            experience = (match.group(1) or ">=", float(match.group(2)))
+            continue
+
+        match = _TEXT_CLAUSE.match(clause)
+        if match:
+            expression = fts_query(match.group(1))
+            if expression:
+                texts.append("(" + expression + ")")
+            continue
+
+        for and_part in _AND.split(clause):
+            alternatives = []
+            for term in _OR.split(and_part):
+                term = term.strip().strip('"').strip()
+                if not term:
+                    continue
+                kind = "skill"
+                if ":" in term:
+                    prefix, rest = term.split(":", 1)
+                    if prefix.strip().lower() in _TERM_TABLES:
+                        kind, term = prefix.strip().lower(), rest.strip()
+                if kind == "skill":
+                    # Stored skills are canonical, so "k8s" must find "Kubernetes"
+                    term = get_skill_matcher().canonicalize(term) or term
+                alternatives.append((kind, normalize_term(term)))
+            if alternatives:
+                groups.append(alternatives)
+
+    return groups, experience, " AND ".join(texts) or None
+
+
+class CandidateStore:
+    """Persists extraction results in normalized SQLite tables with inverted indexes."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, extraction: ExtractedResumeData, source: Optional[str] = None) -> int:
+        """
+        Stores a single extraction result.
+        Args:
+            extraction: ExtractedResumeData dict as returned by agent1_extractor
+            source: Optional origin of the result (e.g. file name)
+        Returns:
+            The new candidate id
+        """
+        with self.conn:
+            return self._insert(extraction, source)
+
+    def add_many(self, extractions: Iterable[Any]) -> List[int]:
+        """
+        Stores a batch of extraction results in a single transaction.
+        Args:
+            extractions: ExtractedResumeData dicts or (extraction, source) pairs
+        Returns:
+            The new candidate ids, in input order
+        """
+        ids = []
+        with self.conn:
+            for item in extractions:
+                if isinstance(item, tuple):
+                    ids.append(self._insert(*item))
+                else:
+                    ids.append(self._insert(item, None))
+        return ids
+
+    def _insert(self, extraction: ExtractedResumeData, source: Optional[str]) -> int:
+        if not isinstance(extraction, dict) or extraction.get("error"):
+            raise ValueError("Cannot store a failed extraction result")
+
+        employment = [e for e in extraction.get("employment_details") or [] if isinstance(e, dict)]
+        education = [e for e in extraction.get("education") or [] if isinstance(e, dict)]
+
+        months, ongoing = _experience(employment)
+        cursor = self.conn.execute(
+            "INSERT INTO candidates (full_name, email, phone_number, experience_months, experience_open, "
+            "experience_start, source, created_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                extraction.get("full_name"),
+                extraction.get("email"),
+                extraction.get("phone_number"),
+                months,
+                int(ongoing),
+                current_month() - months,
+                source,
+                datetime.datetime.now().isoformat(timespec="seconds"),
+                json.dumps(extraction, ensure_ascii=False),
+            )
+        )
+        candidate_id = cursor.lastrowid
+
+        self.conn.executemany(
+            "INSERT INTO education (candidate_id, degree, field, institution, start_date, end_date, grade) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(candidate_id, e.get("degree"), e.get("field"), e.get("institution"),
+              e.get("start_date"), e.get("end_date"), e.get("grade")) for e in education]
+        )
+        self.conn.executemany(
+            "INSERT INTO employment (candidate_id, title, company, company_key, start_date, end_date, location, description) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(candidate_id, e.get("title"), e.get("company"),
+              normalize_term(e["company"]) if e.get("company") else None,
+              e.get("start_date"), e.get("end_date"), e.get("location"), e.get("description")) for e in employment]
+        )
+
+        # Keys are canonical, like query terms, so "K8s" in an older JSON download is found by "Kubernetes"
+        matcher = get_skill_matcher()
+        skill_rows = {}
+        for group in extraction.get("technical_skills") or []:
+            if not isinstance(group, dict):
+                continue
+            for skill in group.get("skills") or []:
+                if isinstance(skill, str) and skill.strip():
+                    skill = matcher.canonicalize(skill) or skill.strip()
+                    skill_rows.setdefault(normalize_term(skill), (skill, group.get("category")))
+        for entry in extraction.get("programming_languages") or []:
+            language = entry.get("language") if isinstance(entry, dict) else entry
+            if isinstance(language, str) and language.strip():
+                language = matcher.canonicalize(language) or language.strip()
+                skill_rows.setdefault(normalize_term(language), (language, "Programming Languages"))
+        self.conn.executemany(
+            "INSERT INTO skills (skill_key, candidate_id, skill, category) VALUES (?, ?, ?, ?)",
+            [(key, candidate_id, skill, category) for key, (skill, category) in skill_rows.items()]
+        )
+
+        language_rows = {}
+        for entry in extraction.get("languages") or []:
+            if isinstance(entry, dict) and isinstance(entry.get("language"), str) and entry["language"].strip():
+                language_rows.setdefault(normalize_term(entry["language"]),
+                                         (entry["language"].strip(), entry.get("proficiency")))
+        self.conn.executemany(
+            "INSERT INTO languages (language_key, candidate_id, language, proficiency) VALUES (?, ?, ?, ?)",
+            [(key, candidate_id, language, proficiency) for key, (language, proficiency) in language_rows.items()]
+        )
+
+        body = " ".join(filter(None, [
+            extraction.get("additional_information"),
+            " ".join(e.get("description") or "" for e in employment),
+            " ".join(filter(None, (e.get("institution") for e in education))),
+            " ".join(s for s in extraction.get("soft_skills") or [] if isinstance(s, str)),
+        ]))
+        self.conn.execute(
+            "INSERT INTO candidates_fts (rowid, full_name, skills, companies, titles, body) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                candidate_id,
+                extraction.get("full_name") or "",
+                " ".join(skill for skill, _ in skill_rows.values()),
+                " ".join(filter(None, (e.get("company") for e in employment))),
+                " ".join(filter(None, (e.get("title") for e in employment))),
+                body,
+            )
+        )
+        return candidate_id
+
+    def delete(self, candidate_id: int) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM candidates_fts WHERE rowid = ?", (candidate_id,))
+            self.conn.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+
+    def get(self, candidate_id: int) -> Optional[ExtractedResumeData]:
+        row = self.conn.execute("SELECT data FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def search(self,
+               skill_groups: Optional[List[List[Tuple[str, str]]]] = None,
+               min_years: Optional[float] = None,
+               max_years: Optional[float] = None,
+               text: Optional[str] = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Finds candidates matching every term group, the experience bounds and an FTS5 text query.
+        Args:
+            skill_groups: AND-ed groups of OR-ed (kind, normalized term) pairs, see parse_query
+            min_years: Minimum total experience in years
+            max_years: Maximum total experience in years
+            text: FTS5 MATCH expression over name, skills, companies, titles and descriptions
+            limit: Maximum number of results
+        Returns:
+            List of {"id", "full_name", "email", "experience_years"} dicts, most experienced first
+        Raises:
+            ValueError: if text is not a valid FTS5 expression
+        """
+        conditions = []
+        params: List[Any] = []
+
+        for group in skill_groups or []:
+            alternatives = []
+            for kind, term in group:
+                table, column = _TERM_TABLES[kind]
+                alternatives.append(f"c.id IN (SELECT candidate_id FROM {table} WHERE {column} = ?)")
+                params.append(term)
+            conditions.append("(" + " OR ".join(alternatives) + ")")
+        if text:
+            conditions.append("c.id IN (SELECT rowid FROM candidates_fts WHERE candidates_fts MATCH ?)")
+            params.append(text)
+
+        # Finished careers rank by experience_months and ongoing ones by experience_start, each on
+        # its own index; the top `limit` of both are merged, so the computed value is never scanned
+        now = current_month()
+        closed_bounds: List[Tuple[str, int]] = []
+        open_bounds: List[Tuple[str, int]] = []
+        if min_years is not None:
+            months = int(round(min_years * 12))
+            closed_bounds.append(("c.experience_months >= ?", months))
+            open_bounds.append(("c.experience_start <= ?", now - months))
+        if max_years is not None:
+            months = int(round(max_years * 12))
+            closed_bounds.append(("c.experience_months <= ?", months))
+            open_bounds.append(("c.experience_start >= ?", now - months))
+
+        branches = []
+        branch_params: List[Any] = []
+        for ongoing, experience, experience_params, order, bounds in (
+            (0, "c.experience_months", [], "c.experience_months DESC", closed_bounds),
+            (1, "? - c.experience_start", [now], "c.experience_start", open_bounds),
+        ):
+            where = [f"c.experience_open = {ongoing}"] + conditions + [bound for bound, _ in bounds]
+            branches.append(
+                f"SELECT * FROM (SELECT c.id, c.full_name, c.email, {experience} AS experience_months "
+                f"FROM candidates c WHERE {' AND '.join(where)} ORDER BY {order}, c.id LIMIT ?)"
+            )
+            branch_params += experience_params + params + [value for _, value in bounds] + [limit]
+
+        sql = " UNION ALL ".join(branches) + " ORDER BY experience_months DESC, id LIMIT ?"
+        try:
+            rows = self.conn.execute(sql, branch_params + [limit]).fetchall()
+        except sqlite3.OperationalError as e:
+            if text:
+                raise ValueError(f"Invalid text query {text!r}: {e}") from e
+            raise
+
+        return [
+            {
+                "id": row["id"],
+                "full_name": row["full_name"],
+                "email": row["email"],
+                "experience_years": round(row["experience_months"] / 12, 1),
+            }
+            for row in rows
+        ]
+
+    def query(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Runs a query string such as "Python AND Kubernetes, >3 years",
+        "company:Google OR company:Meta, language:German" or "Docker, text: node.js OR kube*".
+        """
+        groups, experience, text = parse_query(query)
+        min_years = max_years = None
+        if experience:
+            operator, years = experience
+            if operator in (">", ">="):
+                # ">3 years" means strictly more than 36 months
+                min_years = years + (1 / 12 if operator == ">" else 0)
+            elif operator in ("<", "<="):
+                max_years = years - (1 / 12 if operator == "<" else 0)
+            else:
+                min_years = max_years = years
+        return self.search(groups, min_years=min_years, max_years=max_years, text=text, limit=limit)
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    arg_parser = argparse.ArgumentParser(description="Candidate store over extracted resume JSON files")
+    arg_parser.add_argument("db_path")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    import_cmd = sub.add_parser("import", help="bulk insert extracted JSON files")
+    import_cmd.add_argument("patterns", nargs="+")
+    query_cmd = sub.add_parser("query", help='e.g. "Python AND Kubernetes, >3 years"')
+    query_cmd.add_argument("query")
+    query_cmd.add_argument("--limit", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    with CandidateStore(args.db_path) as store:
+        if args.command == "import":
+            batch = []
+            for pattern in args.patterns:
+                for path in glob.glob(pattern):
+                    with open(path, encoding="utf-8") as f:
+                        batch.append((json.load(f), path))
+            print(f"Imported {len(store.add_many(batch))} candidates")
+        else:
+            try:
+                matches = store.query(args.query, limit=args.limit)
+            except ValueError as e:
+                arg_parser.error(str(e))
+            for match in matches:
+                print(match)
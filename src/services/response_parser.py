@@ -0,0 +1,516 @@
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, get_type_hints, is_typeddict
+
+
+JSON_FIX_INSTRUCTION = """
+You repair malformed JSON. Return ONLY the corrected JSON object (no prose, no Markdown).
+Keep every value that is already present; fix syntax and types, and use null for unknown optional values.
+"""
+
+_MAX_REASK_CHARS = 12000
+
+_CODE_FENCE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_BARE_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*")
+_NUMBER = re.compile(r"-?\d[\d.eE+\-]*|-")
+_LIST_SEPARATOR = re.compile(r"[,;\n]")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false",
+             "None": "null", "NaN": "null", "undefined": "null"}
+
+
+class ResponseParseError(ValueError):
+    """Raised when an LLM response cannot be turned into valid, schema-conforming JSON."""
+
+    def __init__(self, message: str, errors: Optional[List[str]] = None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+_stats_lock = threading.Lock()
+# dropped_values: invalid optional values set to null plus invalid list items dropped
+parse_stats = {"responses": 0, "clean": 0, "repaired": 0, "reasked": 0, "reask_fixed": 0, "failed": 0,
+               "dropped_values": 0}
+
+
+def _count(key: str, amount: int = 1) -> None:
+    with _stats_lock:
+        parse_stats[key] += amount
+
+
+def get_parse_stats() -> Dict[str, Any]:
+    """Returns parse counters plus local repair and re-ask rates."""
+    with _stats_lock:
+        stats: Dict[str, Any] = dict(parse_stats)
+    total = max(1, stats["responses"])
+    stats["repair_rate"] = stats["repaired"] / total
+    stats["reask_rate"] = stats["reasked"] / total
+    return stats
+
+
+def extract_json_text(response: str) -> Optional[str]:
+    """
+    Finds the first JSON object (or array) in an LLM response, ignoring code fences and prose.
+    Args:
+        response: Raw response text
+    Returns:
+        The balanced JSON text, everything from the opening bracket if it is truncated,
+        or None if there is no bracket at all
+    """
+    fenced = _CODE_FENCE.search(response)
+    text = fenced.group(1) if fenced and ("{" in fenced.group(1) or "[" in fenced.group(1)) else response
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return None
+    start = min(starts)
+
+    depth = 0
+    quote = None
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+            continue
+        if char in "\"'":
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def repair_json(text: str) -> str:
+    """
+    Repairs common LLM JSON defects: single-quoted strings, unquoted keys, Python literals,
+    comments, trailing or missing commas, raw newlines in strings and truncated output.
+    Args:
+        text: JSON-like text starting at the opening bracket
+    Returns:
+        Text that json.loads is likely to accept
+    """
+    out: List[str] = []
+    # Open containers: [closing bracket, state] where state is what comes next:
+    # "key", "colon", "value" or "comma"
+    stack: List[List[str]] = []
+    key_start = -1
+    index = 0
+    length = len(text)
+
+    def before_value() -> None:
+        # A value right after another one means a missing comma
+        if stack and stack[-1][1] == "comma":
+            _drop_trailing_comma(out)
+            out.append(",")
+            stack[-1][1] = "key" if stack[-1][0] == "}" else "value"
+
+    def after_value() -> None:
+        if stack:
+            stack[-1][1] = "comma"
+
+    while index < length:
+        char = text[index]
+
+        if char in "\"'":
+            quote = char
+            before_value()
+            is_key = bool(stack) and stack[-1][0] == "}" and stack[-1][1] == "key"
+            if is_key:
+                key_start = len(out)
+            out.append('"')
+            index += 1
+            closed = False
+            while index < length:
+                char = text[index]
+                if char == "\\" and index + 1 < length:
+                    out.append(text[index:index + 2] if text[index + 1] != "'" else "'")
+                    index += 2
+                    continue
+                if char == quote:
+                    closed = True
+                    index += 1
+                    break
+                if char == '"':
+                    out.append('\\"')
+                elif char == "\n":
+                    out.append("\\n")
+                elif char == "\t":
+                    out.append("\\t")
+                elif char != "\r":
+                    out.append(char)
+                index += 1
+            out.append('"')
+            if not closed:
+                # Truncated inside a string: a dangling key is dropped, a value is kept
+                if is_key:
+                    del out[key_start:]
+                break
+            if is_key:
+                stack[-1][1] = "colon"
+            else:
+                after_value()
+            continue
+
+        if text.startswith("//", index):
+            newline = text.find("\n", index)
+            index = length if newline == -1 else newline
+            continue
+        if text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            index = length if end == -1 else end + 2
+            continue
+
+        if char in "{[":
+            before_value()
+            out.append(char)
+            stack.append(["}" if char == "{" else "]", "key" if char == "{" else "value"])
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            if stack and stack[-1][0] == "}" and stack[-1][1] == "value":
+                out.append("null")
+            elif stack and stack[-1][0] == "}" and stack[-1][1] == "colon" and key_start >= 0:
+                # Key without a value
+                del out[key_start:]
+                _drop_trailing_comma(out)
+            if not stack:
+                break
+            # A mismatched bracket closes the innermost open container
+            out.append(stack.pop()[0])
+            after_value()
+            if not stack:
+                break
+        elif char == ":":
+            out.append(char)
+            if stack:
+                stack[-1][1] = "value"
+        elif char == ",":
+            if stack and stack[-1][1] in ("key", "value"):
+                # Doubled comma or comma before the first element
+                index += 1
+                continue
+            out.append(char)
+            if stack:
+                stack[-1][1] = "key" if stack[-1][0] == "}" else "value"
+        elif char.isspace():
+            out.append(char)
+        else:
+            word = _BARE_WORD.match(text, index)
+            number = _NUMBER.match(text, index) if not word else None
+            if word:
+                token = word.group()
+                index = word.end()
+                if stack and stack[-1][0] == "}" and stack[-1][1] in ("key", "comma"):
+                    before_value()
+                    key_start = len(out)
+                    out.append(json.dumps(token))
+                    stack[-1][1] = "colon"
+                else:
+                    before_value()
+                    out.append(_LITERALS.get(token, json.dumps(token)))
+                    after_value()
+                continue
+            if number:
+                token = number.group().rstrip(".eE+-")
+                index = number.end()
+                before_value()
+                out.append(token or "null")
+                after_value()
+                continue
+            # Stray character outside any string
+            index += 1
+            continue
+        index += 1
+
+    # Close whatever the truncation left open
+    if stack:
+        state = stack[-1][1]
+        if stack[-1][0] == "}" and state == "colon" and key_start >= 0:
+            del out[key_start:]
+        elif stack[-1][0] == "}" and state == "value":
+            _drop_trailing_comma(out)
+            if "".join(out).rstrip().endswith(":"):
+                out.append("null")
+        _drop_trailing_comma(out)
+        while stack:
+            _drop_trailing_comma(out)
+            out.append(stack.pop()[0])
+
+    return "".join(out)
+
+
+def _validate(value: Any, expected: Any, path: str, errors: List[str], dropped: List[str]) -> Any:
+    """
+    Checks value against a type hint, applying safe coercions; appends problems to errors
+    and the paths of values dropped instead of failing to dropped.
+    """
+    if expected is Any:
+        return value
+
+    origin = get_origin(expected)
+
+    if origin is Union:
+        options = get_args(expected)
+        if value is None and type(None) in options:
+            return None
+        candidates = [option for option in options if option is not type(None)]
+        if len(candidates) < len(options):
+            return _validate_optional(value, candidates, path, dropped)
+        for option in candidates:
+            option_errors: List[str] = []
+            option_dropped: List[str] = []
+            result = _validate(value, option, path, option_errors, option_dropped)
+            if not option_errors or len(candidates) == 1:
+                errors.extend(option_errors)
+                dropped.extend(option_dropped)
+                return result
+        errors.append(f"{path}: unexpected value {value!r}")
+        return value
+
+    if origin is Literal:
+        options = get_args(expected)
+        if value in options:
+            return value
+        if isinstance(value, str):
+            for option in options:
+                if isinstance(option, str) and option.lower() == value.strip().lower():
+                    return option
+        errors.append(f"{path}: expected one of {list(options)}, got {value!r}")
+        return value
+
+    if origin is list:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            # "Python, SQL; Docker" for a list of skills
+            value = [item.strip() for item in _LIST_SEPARATOR.split(value) if item.strip()]
+        elif isinstance(value, dict):
+            value = [value]
+        if not isinstance(value, list):
+            errors.append(f"{path}: expected a list")
+            return value
+        (item_type,) = get_args(expected) or (Any,)
+        items = []
+        for index, item in enumerate(value):
+            item_errors: List[str] = []
+            item_dropped: List[str] = []
+            result = _validate(item, item_type, f"{path}[{index}]", item_errors, item_dropped)
+            if item_errors:
+                # One malformed entry should not cost the whole list
+                dropped.append(f"{path}[{index}]")
+                continue
+            dropped.extend(item_dropped)
+            items.append(result)
+        return items
+
+    if origin is dict:
+        if not isinstance(value, dict):
+            errors.append(f"{path}: expected an object")
+            return value
+        _, value_type = get_args(expected) or (Any, Any)
+        return {key: _validate(item, value_type, f"{path}.{key}", errors, dropped) for key, item in value.items()}
+
+    if is_typeddict(expected):
+        return _validate_typeddict(value, expected, path, errors, dropped, partial=False)
+
+    if expected is str:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    elif expected is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+    elif expected in (int, float):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return expected(value)
+        if isinstance(value, str):
+            try:
+                return expected(value.strip())
+            except ValueError:
+                pass
+    elif isinstance(value, expected):
+        return value
+
+    errors.append(f"{path}: expected {getattr(expected, '__name__', expected)}, got {value!r}")
+    return value
+
+
+def _validate_optional(value: Any, candidates: List[Any], path: str, dropped: List[str]) -> Any:
+    """An Optional value that cannot be coerced becomes None instead of failing the whole object."""
+    for option in candidates:
+        option_errors: List[str] = []
+        option_dropped: List[str] = []
+        result = _validate(value, option, path, option_errors, option_dropped)
+        if not option_errors:
+            dropped.extend(option_dropped)
+            return result
+    dropped.append(path)
+    return None
+
+
+def _validate_typeddict(value: Any, schema: Any, path: str, errors: List[str], dropped: List[str],
+                        partial: bool) -> Any:
+    hints = get_type_hints(schema)
+    if isinstance(value, str):
+        # A bare "Python" for {"language": "Python", "proficiency": null}
+        required = [key for key, expected in hints.items() if type(None) not in get_args(expected)]
+        if len(required) == 1 and hints[required[0]] is str:
+            value = {required[0]: value}
+    if not isinstance(value, dict):
+        errors.append(f"{path or 'response'}: expected an object")
+        return value
+    if not path and not any(key in value for key in hints):
+        # {} or unrelated keys would otherwise pass as "all fields missing", notably in partial mode
+        errors.append(f"response: none of the expected keys ({', '.join(hints)})")
+        return value
+
+    result = {}
+    for key, expected in hints.items():
+        key_path = f"{path}.{key}" if path else key
+        if key not in value:
+            if partial:
+                continue
+            if type(None) in get_args(expected):
+                result[key] = None
+            else:
+                errors.append(f"{key_path}: missing")
+            continue
+        result[key] = _validate(value[key], expected, key_path, errors, dropped)
+    # Keys outside the schema are dropped
+    return result
+
+
+def validate(value: Any, schema: Any, partial: bool = False) -> Tuple[Any, List[str]]:
+    """
+    Validates parsed JSON against a TypedDict from src/graph/state.py.
+    Missing or invalid Optional values become None, invalid list items and unknown keys are
+    dropped, and unambiguous type mismatches ("0.8" for a float, null for a list, "a, b" for a
+    list of strings, "Python" for {"language": "Python"}) are coerced.
+    The top-level object must contain at least one schema key.
+    Args:
+        value: Parsed JSON
+        schema: TypedDict class
+        partial: Allow missing keys (for results covering part of the schema)
+    Returns:
+        (normalized value, list of validation errors)
+    """
+    value, errors, _ = _validate_schema(value, schema, partial)
+    return value, errors
+
+
+def _validate_schema(value: Any, schema: Any, partial: bool) -> Tuple[Any, List[str], List[str]]:
+    """validate() that also returns the paths of dropped values."""
+    errors: List[str] = []
+    dropped: List[str] = []
+    return _validate_typeddict(value, schema, "", errors, dropped, partial), errors, dropped
+
+
+def _load(response: Optional[str], schema: Any, partial: bool) -> Tuple[Any, bool, List[str]]:
+    """
+    Parses and validates a response, falling back to local repair.
+    Returns (value, repaired, paths of dropped values).
+    """
+    if not response:
+        raise ResponseParseError("Empty LLM response")
+    text = extract_json_text(response)
+    if text is None:
+        raise ResponseParseError("No JSON object in LLM response")
+
+    errors: List[str] = []
+    for repaired, candidate in ((False, text), (True, None)):
+        try:
+            parsed = json.loads(candidate if candidate is not None else repair_json(text))
+        except json.JSONDecodeError as e:
+            errors = [f"invalid JSON: {e}"]
+            continue
+        if schema is None:
+            return parsed, repaired, []
+        parsed, errors, dropped = _validate_schema(parsed, schema, partial)
+        if not errors:
+            return parsed, repaired, dropped
+
+    raise ResponseParseError("LLM response does not match the schema", errors)
+
+
+def load_json(response: Optional[str], schema: Any = None, partial: bool = False) -> Any:
+    """
+    Parses an LLM response locally (extraction, repair, validation) without re-asking or counting.
+    Raises:
+        ResponseParseError: if the response cannot be parsed or validated
+    """
+    return _load(response, schema, partial)[0]
+
+
+def build_fix_prompt(response: str, errors: List[str], schema: Any = None) -> str:
+    text = extract_json_text(response) or response
+    lines = ["Fix this JSON."]
+    if schema is not None:
+        fields = ", ".join(get_type_hints(schema))
+        lines.append(f"The top-level object must have exactly these keys: {fields}.")
+    if errors:
+        lines.append("Problems:")
+        lines.extend(f"- {error}" for error in errors[:10])
+    lines.append("JSON:")
+    lines.append(text[:_MAX_REASK_CHARS])
+    return "\n".join(lines)
+
+
+def parse_response(response: Optional[str], schema: Any = None,
+                   reask: Optional[Callable[[str, str], str]] = None, partial: bool = False) -> Any:
+    """
+    Parses an LLM response into schema-conforming JSON.
+    Local repair is tried first; only if it fails is the model re-asked, once, with a short
+    "fix this JSON" prompt.
+    Args:
+        response: Raw response text
+        schema: TypedDict to validate against (None skips validation)
+        reask: Callable(user_prompt, system_instruction) -> response, e.g. a call_llm wrapper
+        partial: Allow missing keys
+    Returns:
+        The parsed and validated value
+    Raises:
+        ResponseParseError: if neither local repair nor the re-ask produced valid JSON
+    """
+    _count("responses")
+    try:
+        value, repaired, dropped = _load(response, schema, partial)
+        _count("repaired" if repaired else "clean")
+        _count("dropped_values", len(dropped))
+        return value
+    except ResponseParseError as e:
+        error = e
+
+    # Nothing to repair when the call itself failed or returned no JSON at all
+    if reask is None or not response or extract_json_text(response) is None:
+        _count("failed")
+        raise error
+
+    _count("reasked")
+    fixed = reask(build_fix_prompt(response, error.errors, schema), JSON_FIX_INSTRUCTION)
+    try:
+        value, _, dropped = _load(fixed, schema, partial)
+    except ResponseParseError:
+        _count("failed")
+        raise error
+    _count("reask_fixed")
+    _count("dropped_values", len(dropped))
+    return value
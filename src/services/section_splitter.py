@@ -0,0 +1,165 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+HEADER_SECTION = "header"
+
+# Canonical section name -> heading variants (lower-case, without punctuation).
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "education": [
+        "education", "academic background", "academic qualifications", "qualifications",
+        "education and training", "degrees",
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment",
+        "employment history", "work history", "career history", "positions held",
+        "academic positions", "appointments", "research experience", "teaching experience",
+    ],
+    "publications": [
+        "publications", "selected publications", "journal articles", "conference papers",
+        "peer reviewed publications", "papers", "preprints", "books", "book chapters",
+    ],
+    "projects": [
+        "projects", "selected projects", "personal projects", "research projects",
+        "key projects", "open source", "open source contributions",
+    ],
+    "skills": [
+        "skills", "technical skills", "core skills", "key skills", "competencies",
+        "core competencies", "technologies", "tools", "programming languages",
+        "skills and tools", "soft skills",
+    ],
+    "languages": [
+        "languages", "language skills", "spoken languages",
+    ],
+    "other": [
+        "summary", "profile", "professional summary", "about me", "objective",
+        "certifications", "certificates", "awards", "honors", "honours", "honors and awards",
+        "grants", "interests", "hobbies", "volunteering", "volunteer experience",
+        "activities", "references", "additional information", "memberships",
+        "professional memberships", "talks", "presentations", "invited talks",
+    ],
+}
+
+_HEADING_LOOKUP: Dict[str, str] = {
+    variant: section
+    for section, variants in SECTION_HEADINGS.items()
+    for variant in variants
+}
+
+_MAX_HEADING_WORDS = 5
+_BULLET_CHARS = "•·-–—*▪●○#>|"
+
+
+def _normalize_heading(text: str) -> str:
+    text = text.strip().strip(_BULLET_CHARS).strip()
+    text = text.replace("&", " and ")
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def detect_heading(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Detects whether a line is a section heading.
+    Args:
+        line: A single line of CV text
+    Returns:
+        (section name, inline content after the heading) or None if the line is not a heading
+    """
+    stripped = line.strip()
+    if not stripped:
+        return None
+
+    inline = ""
+    candidate = stripped
+    # "Skills: Python, SQL" style headings carry content on the same line
+    if ":" in stripped:
+        candidate, inline = stripped.split(":", 1)
+        inline = inline.strip()
+
+    normalized = _normalize_heading(candidate)
+    if not normalized or len(normalized.split()) > _MAX_HEADING_WORDS:
+        return None
+
+    section = _HEADING_LOOKUP.get(normalized)
+    if section is None:
+        return None
+
+    return section, inline
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    Splits CV text into sections by heading detection.
+    Text before the first recognised heading goes to the "header" section;
+    repeated headings of the same kind are concatenated. A "Label: value" line only
+    starts a section at the top of a block (after a blank line or another heading):
+    "Technologies: Python, Kafka" inside a job entry is part of that entry.
+    Args:
+        text: Plain CV text
+    Returns:
+        Mapping of section name to section text, in order of first appearance
+    """
+    sections: Dict[str, List[str]] = {HEADER_SECTION: []}
+    current = HEADER_SECTION
+    block_start = True
+
+    for line in text.splitlines():
+        heading = detect_heading(line)
+        if heading and heading[1] and not block_start:
+            heading = None
+        if heading:
+            current, inline = heading
+            sections.setdefault(current, [])
+            if inline:
+                sections[current].append(inline)
+            block_start = True
+            continue
+        sections[current].append(line)
+        block_start = not line.strip()
+
+    result = {}
+    for name, lines in sections.items():
+        section_text = "\n".join(lines).strip()
+        if section_text:
+            result[name] = section_text
+    return result
+
+
+def chunk_section(text: str, max_chars: int) -> List[str]:
+    """
+    Splits an oversized section into chunks on line boundaries, preferring blank lines.
+    Args:
+        text: Section text
+        max_chars: Maximum chunk length in characters
+    Returns:
+        List of chunks (a single chunk if the section already fits)
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+    last_blank = -1
+
+    for line in text.splitlines():
+        if current and current_len + len(line) + 1 > max_chars:
+            # Cut at the last blank line when there is one, so entries stay intact
+            if last_blank > 0:
+                chunks.append("\n".join(current[:last_blank]).strip())
+                current = current[last_blank + 1:]
+            else:
+                chunks.append("\n".join(current).strip())
+                current = []
+            current_len = sum(len(l) + 1 for l in current)
+            last_blank = -1
+
+        if not line.strip():
+            last_blank = len(current)
+        current.append(line)
+        current_len += len(line) + 1
+
+    if current:
+        chunks.append("\n".join(current).strip())
+
+    return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,158 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from config.settings import SKILL_TAXONOMY_PATH
+
+
+PROGRAMMING_LANGUAGES_CATEGORY = "Programming Languages"
+
+# A match must not be glued to surrounding letters/digits, nor to "+"/"#" ("C" inside "C++" or "C#")
+_BOUNDARY_BEFORE = r"(?<![^\W_]|[+#])"
+_BOUNDARY_AFTER = r"(?![^\W_]|[+#])"
+
+
+def normalize_alias(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _trie_to_regex(node: Dict[str, Any]) -> str:
+    terminal = "" in node
+    branches = []
+    for char, child in sorted(node.items()):
+        if not char:
+            continue
+        token = r"\s+" if char == " " else re.escape(char)
+        branches.append(token + _trie_to_regex(child))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # Greedy optional continuation: the longest alias wins at a given position
+    return "(?:" + body + ")?" if terminal else body
+
+
+class SkillMatcher:
+    """
+    Skill dictionary (alias -> canonical name -> category) compiled into a trie automaton.
+    The trie is emitted as a single regular expression, so scanning is one linear pass
+    in the C regex engine instead of a per-character Python loop.
+    Aliases listed under "lookup_only" in the taxonomy are ordinary words or names
+    ("C", "Go", "Julia", "Spring") and only canonicalize skills the LLM returned;
+    they are never matched in free text.
+    """
+
+    def __init__(self, taxonomy: Dict[str, Any]):
+        lookup_only = {normalize_alias(alias) for alias in taxonomy.get("lookup_only", [])}
+
+        self.categories: Dict[str, str] = {}
+        # Exact lookups for canonicalizing LLM-provided skill names
+        self.aliases: Dict[str, str] = {}
+        # Scan patterns: normalized alias -> canonical name
+        self._patterns: Dict[str, str] = {}
+
+        for category, skills in taxonomy.get("categories", {}).items():
+            for canonical, aliases in skills.items():
+                self.categories[canonical] = category
+                for alias in [canonical, *aliases]:
+                    key = normalize_alias(alias)
+                    # Skill lists from the LLM are unambiguous, so exact lookups ignore case
+                    self.aliases.setdefault(key, canonical)
+                    if key not in lookup_only:
+                        self._patterns.setdefault(key, canonical)
+
+        trie: Dict[str, Any] = {}
+        for key in self._patterns:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        self._regex = re.compile(_BOUNDARY_BEFORE + "(?:" + _trie_to_regex(trie) + ")" + _BOUNDARY_AFTER)
+
+    def canonicalize(self, skill: str) -> Optional[str]:
+        """Returns the canonical name of a known skill alias, or None."""
+        return self.aliases.get(normalize_alias(skill))
+
+    def scan(self, text: str) -> List[str]:
+        """
+        Finds taxonomy skills mentioned in text.
+        Overlapping aliases resolve to the leftmost, then longest, match.
+        Args:
+            text: Plain CV text
+        Returns:
+            Canonical skill names in order of first appearance
+        """
+        lowered = text.lower()
+
+        found = []
+        seen = set()
+        for match in self._regex.finditer(lowered):
+            canonical = self._patterns[normalize_alias(match.group())]
+            if canonical not in seen:
+                seen.add(canonical)
+                found.append(canonical)
+        return found
+
+    def normalize_extraction(self, extraction: Dict[str, Any], text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Canonicalizes and deduplicates technical_skills and programming_languages,
+        regrouping known skills under their taxonomy category.
+        Args:
+            extraction: ExtractedResumeData dict (modified in place)
+            text: Optional Skills-section text; taxonomy skills found in it are merged in
+        Returns:
+            The updated extraction dict
+        """
+        groups: Dict[Optional[str], List[str]] = {}
+        seen = set()
+        proficiency: Dict[str, Optional[str]] = {}
+
+        def add(skill: str, category: Optional[str]) -> None:
+            skill = skill.strip()
+            canonical = self.canonicalize(skill)
+            if canonical:
+                skill, category = canonical, self.categories[canonical]
+            key = normalize_alias(skill)
+            if not key or key in seen:
+                return
+            seen.add(key)
+            groups.setdefault(category, []).append(skill)
+
+        for entry in extraction.get("programming_languages") or []:
+            language = entry.get("language") if isinstance(entry, dict) else entry
+            if isinstance(language, str):
+                add(language, PROGRAMMING_LANGUAGES_CATEGORY)
+                if isinstance(entry, dict) and entry.get("proficiency"):
+                    proficiency[self.canonicalize(language) or language.strip()] = entry["proficiency"]
+
+        for group in extraction.get("technical_skills") or []:
+            if isinstance(group, dict):
+                for skill in group.get("skills") or []:
+                    if isinstance(skill, str):
+                        add(skill, group.get("category"))
+
+        if text:
+            for canonical in self.scan(text):
+                add(canonical, self.categories[canonical])
+
+        languages = groups.pop(PROGRAMMING_LANGUAGES_CATEGORY, [])
+        extraction["programming_languages"] = [
+            {"language": language, "proficiency": proficiency.get(language)} for language in languages
+        ] or None
+        extraction["technical_skills"] = [
+            {"category": category, "skills": skills} for category, skills in groups.items()
+        ] or None
+        return extraction
+
+
+def load_taxonomy(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_skill_matcher(path: str = SKILL_TAXONOMY_PATH) -> SkillMatcher:
+    """Returns the compiled matcher for a taxonomy file, building it once per process."""
+    return SkillMatcher(load_taxonomy(path))
+
@@ -0,0 +1,155 @@
+import pytest
+
+from src.services import candidate_store
+from src.services.candidate_store import CandidateStore, fts_query
+
+
+def candidate(name, skills=(), jobs=(), languages=(), about=None):
+    return {
+        "full_name": name,
+        "email": f"{name.lower()}@example.com",
+        "employment_details": [
+            {"title": "Engineer", "company": company, "start_date": start, "end_date": end}
+            for company, start, end in jobs
+        ],
+        "technical_skills": [{"category": None, "skills": list(skills)}] if skills else None,
+        "languages": [{"language": language, "proficiency": None} for language in languages],
+        "additional_information": about,
+    }
+
+
+@pytest.fixture
+def store():
+    with CandidateStore(":memory:") as store:
+        yield store
+
+
+def names(results):
+    return [result["full_name"] for result in results]
+
+
+@pytest.mark.parametrize("text, expression", [
+    ("node.js", '"node.js"'),
+    ("c++", '"c++"'),
+    ('"unterminated', '"unterminated"'),
+    ("kafka streams", '"kafka" AND "streams"'),
+    ('"event sourcing" OR cqrs', '"event sourcing" OR "cqrs"'),
+    ("kube*", '"kube"*'),
+    ("OR", ""),
+])
+def test_fts_query_quotes_terms(text, expression):
+    assert fts_query(text) == expression
+
+
+@pytest.mark.parametrize("query", ["text: node.js", "text: c++", 'text: "unterminated', "text: NOT", "text: a AND"])
+def test_text_clause_never_raises(store, query):
+    store.add(candidate("Ann", about="Backend services in node.js and c++"))
+
+    assert isinstance(store.query(query), list)
+
+
+def test_text_clause_matches_descriptions(store):
+    store.add(candidate("Ann", about="Built node.js services"))
+    store.add(candidate("Bob", about="Kubernetes operators"))
+
+    assert names(store.query("text: node.js")) == ["Ann"]
+    assert names(store.query("text: kube*")) == ["Bob"]
+
+
+def test_invalid_raw_fts_expression_is_a_value_error(store):
+    store.add(candidate("Ann", about="node.js"))
+
+    with pytest.raises(ValueError):
+        store.search(text="node.js")
+
+
+def test_experience_only_query_uses_the_indexes(store):
+    plan = " ".join(
+        row[3] for row in store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM candidates c WHERE c.experience_open = 0 "
+            "AND c.experience_months >= 36 ORDER BY c.experience_months DESC, c.id LIMIT 5"
+        )
+    )
+    assert "idx_candidates_experience" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_ongoing_experience_grows_after_insertion(store, monkeypatch):
+    now = candidate_store.current_month()
+    year, month = divmod(now - 24, 12)
+    store.add(candidate("Ongoing", jobs=[("Acme", f"{year}-{month + 1:02d}", "present")]))
+    store.add(candidate("Finished", jobs=[("Beta", "2010-01", "2012-12")]))
+
+    assert names(store.query(">3 years")) == []
+
+    # Two years later the ongoing job counts 49 months, the finished one still 36
+    monkeypatch.setattr(candidate_store, "current_month", lambda: now + 24)
+    assert names(store.query(">3 years")) == ["Ongoing"]
+    assert names(store.query("<=3 years")) == ["Finished"]
+    assert store.query(">1 years")[0]["experience_years"] == round(49 / 12, 1)
+
+
+def test_add_many_stores_a_batch(store):
+    ids = store.add_many([candidate("Ann", skills=["Python"]), (candidate("Bob"), "bob.pdf")])
+
+    assert store.count() == 2
+    assert store.get(ids[0])["full_name"] == "Ann"
+    assert store.conn.execute("SELECT source FROM candidates WHERE id = ?", (ids[1],)).fetchone()[0] == "bob.pdf"
+
+
+def test_add_many_rolls_back_on_a_failed_extraction(store):
+    with pytest.raises(ValueError):
+        store.add_many([candidate("Ann"), {"error": "Failed to parse LLM response as JSON"}])
+
+    assert store.count() == 0
+
+
+@pytest.mark.parametrize("query, groups, experience, text", [
+    ("Python AND Kubernetes, >3 years", [[("skill", "python")], [("skill", "kubernetes")]], (">", 3.0), None),
+    ("go or rust and docker", [[("skill", "go"), ("skill", "rust")], [("skill", "docker")]], None, None),
+    ("company:Google OR company: Meta, language:German",
+     [[("company", "google"), ("company", "meta")], [("language", "german")]], None, None),
+    ("k8s, 5+ years", [[("skill", "kubernetes")]], (">=", 5.0), None),
+    ("Docker, text: node.js", [[("skill", "docker")]], None, '("node.js")'),
+])
+def test_parse_query(query, groups, experience, text):
+    assert candidate_store.parse_query(query) == (groups, experience, text)
+
+
+@pytest.fixture
+def people(store):
+    store.add_many([
+        candidate("Ann", skills=["Python", "Kubernetes"], jobs=[("Google", "2015-01", "2020-12")], languages=["German"]),
+        candidate("Bob", skills=["Python"], jobs=[("Meta", "2021-01", "2022-12")]),
+        candidate("Cem", skills=["Go", "Docker"], jobs=[("Acme", "2010-01", "2011-12")], languages=["English"]),
+    ])
+    return store
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Python", ["Ann", "Bob"]),
+    ("Python AND Kubernetes", ["Ann"]),
+    ("python and k8s", ["Ann"]),
+    ("Kubernetes OR Go", ["Ann", "Cem"]),
+    ("Python, >3 years", ["Ann"]),
+    ("<3 years", ["Bob", "Cem"]),
+    ("company:google OR company:Meta", ["Ann", "Bob"]),
+    ("language:german", ["Ann"]),
+    ("lang:English, Docker", ["Cem"]),
+    ("Rust", []),
+])
+def test_query(people, query, expected):
+    assert names(people.query(query)) == expected
+
+
+def test_delete_cascades_to_indexes(people):
+    (ann,) = people.query("Python AND Kubernetes")
+
+    people.delete(ann["id"])
+
+    assert people.get(ann["id"]) is None
+    assert names(people.query("Python")) == ["Bob"]
+    for table in ("skills", "languages", "employment", "education"):
+        assert people.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE candidate_id = ?", (ann["id"],)).fetchone()[0] == 0
+    assert people.conn.execute("SELECT COUNT(*) FROM candidates_fts WHERE rowid = ?", (ann["id"],)).fetchone()[0] == 0
+    assert names(people.query("text: Ann")) == []
@@ -0,0 +1,196 @@
+import json
+
+import pytest
+
+import agents
+import llmclient
+from conftest import endpoint
+
+
+MODEL = "stub-model"
+
+
+@pytest.fixture(autouse=True)
+def reset_llmclient(monkeypatch):
+    monkeypatch.setattr(llmclient, "_router", None)
+    monkeypatch.setattr(llmclient, "_hedging_policies", {})
+    llmclient.cascade_stats.clear()
+    yield
+    llmclient._router = None
+
+
+def reply(content, delay=0.0, status=200):
+    return lambda model, body: (content, delay, status)
+
+
+def test_failover_to_next_endpoint(stub_server):
+    broken = stub_server(reply("", status=500))
+    healthy = stub_server(reply("ok"))
+    router = llmclient.configure_endpoints([endpoint(broken, "broken"), endpoint(healthy, "healthy")])
+
+    assert llmclient.call_llm("hi", model=MODEL) == "ok"
+
+    # No client-side retries when another endpoint can take over
+    assert len(broken.calls) == 1
+    stats = router.stats()
+    assert stats["broken"]["failures"] == 1
+    assert stats["healthy"]["failures"] == 0
+    # The failed endpoint is moved back while it cools down
+    assert [e.name for e in router.ranked(MODEL)] == ["healthy", "broken"]
+
+
+def test_every_endpoint_failing_returns_api_error(stub_server):
+    broken = stub_server(reply("", status=500))
+    llmclient.configure_endpoints([endpoint(broken, "broken")])
+
+    response = llmclient.call_llm("hi", model=MODEL)
+
+    assert llmclient.is_api_error(response)
+    assert "500" in response
+
+
+def test_single_endpoint_retries_transient_errors(stub_server):
+    statuses = iter([500, 429, 200])
+    server = stub_server(lambda model, body: ("ok", 0, next(statuses)))
+    router = llmclient.configure_endpoints([endpoint(server, "only")])
+
+    assert llmclient.call_llm("hi", model=MODEL) == "ok"
+    assert len(server.calls) == 3
+    assert router.stats()["only"]["failures"] == 0
+
+
+def test_ranking_prefers_lower_ewma_latency(stub_server):
+    slow = stub_server(reply("slow", delay=0.2))
+    fast = stub_server(reply("fast"))
+    router = llmclient.configure_endpoints([endpoint(slow, "slow"), endpoint(fast, "fast")])
+
+    responses = [llmclient.call_llm("hi", model=MODEL) for _ in range(5)]
+
+    # Both endpoints get measured once, then the fast one takes the traffic
+    assert responses[:2] == ["slow", "fast"]
+    assert responses[2:] == ["fast"] * 3
+    assert router.ranked(MODEL)[0].name == "fast"
+    assert router.stats()["slow"]["ewma_latency"] > router.stats()["fast"]["ewma_latency"]
+
+
+def test_endpoints_only_receive_their_models(stub_server):
+    small = stub_server(reply("small"))
+    large = stub_server(reply("large"))
+    llmclient.configure_endpoints([endpoint(small, "small", models=["mini"]), endpoint(large, "large", models=["max"])])
+
+    assert llmclient.call_llm("hi", model="max") == "large"
+    assert llmclient.call_llm("hi", model="mini") == "small"
+    assert llmclient.is_api_error(llmclient.call_llm("hi", model="other"))
+
+
+def test_malformed_endpoint_config_returns_api_error(monkeypatch):
+    monkeypatch.setattr(llmclient, "LLM_ENDPOINTS", "[{not json")
+
+    response = llmclient.call_llm("hi", model=MODEL)
+
+    assert response.startswith(llmclient.API_GENERAL_ERROR)
+
+
+def test_cascade_escalates_rejected_response(stub_server, monkeypatch):
+    server = stub_server(lambda model, body: ("bad" if model == "small" else "good", 0, 200))
+    llmclient.configure_endpoints([endpoint(server, "stub")])
+    monkeypatch.setitem(llmclient.AGENT_MODELS, "extractor", ["small", "large"])
+
+    response = llmclient.call_agent("extractor", "cv", accept=lambda r: r == "good")
+
+    assert response == "good"
+    assert server.calls == ["small", "large"]
+    assert llmclient.cascade_stats["extractor"] == {"calls": 2, "escalations": 1}
+
+
+def test_cascade_stops_at_accepted_response(stub_server, monkeypatch):
+    server = stub_server(reply("good"))
+    llmclient.configure_endpoints([endpoint(server, "stub")])
+    monkeypatch.setitem(llmclient.AGENT_MODELS, "extractor", ["small", "large"])
+
+    assert llmclient.call_agent("extractor", "cv", accept=lambda r: r == "good") == "good"
+    assert server.calls == ["small"]
+
+
+def test_cascade_escalates_api_errors(stub_server, monkeypatch):
+    server = stub_server(lambda model, body: ("", 0, 500) if model == "small" else ("good", 0, 200))
+    llmclient.configure_endpoints([endpoint(server, "stub")])
+    monkeypatch.setitem(llmclient.AGENT_MODELS, "summarizer", ["small", "large"])
+
+    assert llmclient.call_agent("summarizer", "cv") == "good"
+
+
+def _warm_policy(model, latency):
+    policy = llmclient.HedgingPolicy(max_rate=1.0, min_samples=1)
+    policy.record(latency, False, False)
+    llmclient._hedging_policies[model] = policy
+    return policy
+
+
+def test_hedge_wins_and_stalled_endpoint_is_penalized(stub_server):
+    stalled = stub_server(reply("stalled", delay=2.0))
+    fast = stub_server(reply("fast"))
+    router = llmclient.configure_endpoints([endpoint(stalled, "stalled"), endpoint(fast, "fast")])
+    policy = _warm_policy(MODEL, 0.05)
+
+    assert llmclient.call_llm("hi", model=MODEL, hedge=True) == "fast"
+
+    assert (policy.hedges_fired, policy.hedges_won) == (1, 1)
+    stats = router.stats()
+    # The cancelled call is recorded as a lower bound, not as a failure
+    assert stats["stalled"]["cancelled"] == 1
+    assert stats["stalled"]["failures"] == 0
+    assert stats["stalled"]["ewma_latency"] > stats["fast"]["ewma_latency"]
+    assert router.ranked(MODEL)[0].name == "fast"
+
+
+def test_no_hedge_when_primary_is_fast(stub_server):
+    server = stub_server(reply("ok"))
+    llmclient.configure_endpoints([endpoint(server, "a"), endpoint(server, "b")])
+    policy = _warm_policy(MODEL, 1.0)
+
+    assert llmclient.call_llm("hi", model=MODEL, hedge=True) == "ok"
+    assert server.calls == [MODEL]
+    assert (policy.calls, policy.hedges_fired) == (2, 0)
+
+
+def test_hedging_policy_is_kept_per_model(stub_server):
+    server = stub_server(reply("ok"))
+    llmclient.configure_endpoints([endpoint(server, "stub")])
+
+    llmclient.call_llm("hi", model="mini", hedge=True)
+    llmclient.call_llm("hi", model="mini", hedge=True)
+    llmclient.call_llm("hi", model="max", hedge=True)
+
+    stats = llmclient.hedging_stats()
+    assert stats["mini"]["calls"] == 2
+    assert stats["max"]["calls"] == 1
+
+
+def _validation(is_resume, confidence, action):
+    return json.dumps({
+        "is_resume": is_resume, "primary_format": "cv" if is_resume else "other", "confidence": confidence,
+        "explain": "stub", "evidence": [], "suggested_action": action, "excerpt": "stub",
+    })
+
+
+@pytest.mark.parametrize("small_verdict, escalated", [
+    ((True, 0.9, "proceed"), False),
+    # A clear rejection reports low confidence by design
+    ((False, 0.1, "reject"), False),
+    ((False, 0.4, "ask_for_more"), True),
+    ((True, 0.5, "proceed"), True),
+    ((True, 0.9, "reject"), True),
+])
+def test_validator_cascade_escalates_only_ambiguous_verdicts(stub_server, monkeypatch, small_verdict, escalated):
+    large_verdict = (True, 0.95, "proceed")
+    server = stub_server(lambda model, body: (
+        _validation(*(small_verdict if model == "small" else large_verdict)), 0, 200))
+    llmclient.configure_endpoints([endpoint(server, "stub")])
+    monkeypatch.setitem(llmclient.AGENT_MODELS, "validator", ["small", "large"])
+
+    result = agents.agent0_validator("cv text")
+
+    assert server.calls == (["small", "large"] if escalated else ["small"])
+    expected = large_verdict if escalated else small_verdict
+    assert (result["is_resume"], result["confidence"], result["suggested_action"]) == expected
@@ -0,0 +1,154 @@
+import json
+
+import pytest
+
+from src.graph.state import ExtractedResumeData, ResumeSummary, ResumeValidationResult
+from src.services import response_parser
+from src.services.response_parser import (
+    JSON_FIX_INSTRUCTION, ResponseParseError, extract_json_text, parse_response, repair_json, validate,
+)
+
+
+@pytest.mark.parametrize("response, expected", [
+    ('{"a": 1}', '{"a": 1}'),
+    ('Here you go:\n```json\n{"a": 1}\n```\nThanks', '{"a": 1}'),
+    ('```\n[1, 2]\n```', '[1, 2]'),
+    ('Sure! {"a": {"b": "}"}} is the answer', '{"a": {"b": "}"}}'),
+    # Truncated: everything from the opening bracket
+    ('Result: {"a": [1, 2', '{"a": [1, 2'),
+    ('no json here', None),
+])
+def test_extract_json_text(response, expected):
+    assert extract_json_text(response) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ("{'a': 'it\\'s', 'b': True, 'c': None}", {"a": "it's", "b": True, "c": None}),
+    ('{a: 1, b: "x"}', {"a": 1, "b": "x"}),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}),
+    ('{"a": 1, // comment\n "b": 2}', {"a": 1, "b": 2}),
+    ('{"a": "line\nbreak"}', {"a": "line\nbreak"}),
+    # Truncated output
+    ('{"a": "x", "b": [1, 2', {"a": "x", "b": [1, 2]}),
+    ('{"a": "unterminated', {"a": "unterminated"}),
+    ('{"a": 1, "b', {"a": 1}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    counters = dict.fromkeys(response_parser.parse_stats, 0)
+    monkeypatch.setattr(response_parser, "parse_stats", counters)
+    return counters
+
+
+def _reask_with(reply):
+    calls = []
+
+    def reask(user_prompt, system_instruction):
+        calls.append((user_prompt, system_instruction))
+        return reply
+    reask.calls = calls
+    return reask
+
+
+def test_clean_and_locally_repaired_responses_do_not_reask(stats):
+    reask = _reask_with('{"summary": "never used"}')
+
+    assert parse_response('{"summary": "ok"}', ResumeSummary, reask=reask) == {"summary": "ok"}
+    assert parse_response("```json\n{'summary': 'ok',}\n```", ResumeSummary, reask=reask) == {"summary": "ok"}
+
+    assert reask.calls == []
+    assert (stats["clean"], stats["repaired"], stats["reasked"]) == (1, 1, 0)
+
+
+def test_reask_fixes_schema_errors(stats):
+    reask = _reask_with('{"summary": "fixed"}')
+
+    assert parse_response('{"summary": null}', ResumeSummary, reask=reask) == {"summary": "fixed"}
+
+    ((prompt, system_instruction),) = reask.calls
+    assert system_instruction == JSON_FIX_INSTRUCTION
+    assert "summary: expected str" in prompt
+    assert (stats["reasked"], stats["reask_fixed"], stats["failed"]) == (1, 1, 0)
+
+
+@pytest.mark.parametrize("partial", [False, True])
+def test_empty_reask_reply_is_not_a_fix(stats, partial):
+    reask = _reask_with("{}")
+
+    with pytest.raises(ResponseParseError):
+        parse_response('{"name": "Jane Doe", "mail": "jane@example.com"}', ExtractedResumeData,
+                       reask=reask, partial=partial)
+
+    assert (stats["reasked"], stats["reask_fixed"], stats["failed"]) == (1, 0, 1)
+
+
+def test_no_reask_without_json(stats):
+    reask = _reask_with('{"summary": "x"}')
+
+    with pytest.raises(ResponseParseError):
+        parse_response("I cannot help with that.", ResumeSummary, reask=reask)
+
+    assert reask.calls == []
+    assert stats["failed"] == 1
+
+
+def test_partial_mode_accepts_a_subset_of_fields():
+    assert parse_response('{"soft_skills": ["teamwork"]}', ExtractedResumeData, partial=True) == {
+        "soft_skills": ["teamwork"]
+    }
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("programming_languages", ["Python", {"language": "Go", "proficiency": "basic"}],
+     [{"language": "Python", "proficiency": None}, {"language": "Go", "proficiency": "basic"}]),
+    ("programming_languages", "Python, SQL",
+     [{"language": "Python", "proficiency": None}, {"language": "SQL", "proficiency": None}]),
+    ("languages", ["English"], [{"language": "English", "proficiency": None}]),
+    ("soft_skills", "teamwork; communication\nleadership", ["teamwork", "communication", "leadership"]),
+    ("technical_skills", {"category": None, "skills": "Docker, Kubernetes"},
+     [{"category": None, "skills": ["Docker", "Kubernetes"]}]),
+    # Invalid optional values become null instead of failing the object
+    ("email", {"work": "a@b.c"}, None),
+    ("additional_information", ["a", "b"], None),
+    # Only the malformed entry is dropped
+    ("programming_languages", ["Python", {"proficiency": "expert"}], [{"language": "Python", "proficiency": None}]),
+    ("employment_details", [{"title": "Dev", "start_date": {"year": 2020}}],
+     [{"title": "Dev", "company": None, "start_date": None, "end_date": None, "location": None, "description": None}]),
+])
+def test_extraction_coercions(field, value, expected):
+    result, errors = validate({"full_name": "Jane Doe", field: value}, ExtractedResumeData)
+
+    assert errors == []
+    assert result["full_name"] == "Jane Doe"
+    assert result[field] == expected
+
+
+def test_required_fields_still_fail():
+    response = {"is_resume": "maybe", "primary_format": "cv", "confidence": 0.9, "explain": "",
+                "evidence": [], "suggested_action": "proceed", "excerpt": ""}
+
+    _, errors = validate(response, ResumeValidationResult)
+
+    assert errors == ["is_resume: expected bool, got 'maybe'"]
+
+
+def test_dropped_values_are_counted_not_logged(stats, caplog, capsys):
+    response = json.dumps({
+        "full_name": "Jane Doe",
+        "email": {"work": "a@b.c"},
+        "programming_languages": ["Python", {"proficiency": "expert"}, 42],
+    })
+
+    result = parse_response(response, ExtractedResumeData)
+
+    assert result["email"] is None
+    assert result["programming_languages"] == [{"language": "Python", "proficiency": None}]
+    assert stats["dropped_values"] == 3
+    assert caplog.records == []
+    assert capsys.readouterr().err == ""
@@ -0,0 +1,188 @@
+import json
+import re
+
+import pytest
+
+import agents
+import llmclient
+from conftest import endpoint
+from src.services.section_splitter import chunk_section, split_sections
+
+
+_KEYS = re.compile(r"MUST contain only these keys: (.+)")
+_JOB = re.compile(r"^(.+?), (.+?), (\d{4})-(\d{4}|present)$", re.MULTILINE)
+
+
+def long_cv():
+    publications = "\n".join(
+        f"{index}. A. Author, B. Author. Study number {index} of streaming systems. Journal of Data, 20{index % 20:02d}."
+        for index in range(1, 161)
+    )
+    return f"""Jane Doe
+jane@example.com
+
+Experience
+Senior Engineer, Acme Corp, 2019-present
+Built the event pipeline.
+Technologies: Python, Kafka
+Engineer, Beta Ltd, 2015-2019
+Maintained the billing service.
+
+Education
+MSc Computer Science, Example University, 2013-2015
+
+Skills
+Go, Docker
+
+Publications
+{publications}
+"""
+
+
+def section_reply(model, body):
+    """Stub LLM for section prompts: reads the requested fields and answers from the text it was given."""
+    system, user = body["messages"][0]["content"], body["messages"][-1]["content"]
+    fields = [field.strip() for field in _KEYS.search(system).group(1).split(",")]
+    reply = dict.fromkeys(fields)
+    if "employment_details" in fields:
+        reply["employment_details"] = [
+            {"title": title, "company": company, "start_date": start, "end_date": end}
+            for title, company, start, end in _JOB.findall(user)
+        ]
+    if "technical_skills" in fields:
+        skills = [skill.strip() for line in user.splitlines() for skill in line.split(",") if skill.strip()]
+        reply["technical_skills"] = [{"category": None, "skills": skills}]
+    if "full_name" in fields:
+        reply["full_name"] = user.splitlines()[0]
+    return json.dumps(reply), 0, 200
+
+
+@pytest.fixture
+def stub_llm(stub_server, monkeypatch):
+    def start(handler):
+        server = stub_server(handler)
+        monkeypatch.setattr(llmclient, "_router", None)
+        monkeypatch.setitem(llmclient.AGENT_MODELS, "extractor", ["stub-model"])
+        llmclient.configure_endpoints([endpoint(server, "stub")])
+        return server
+    return start
+
+
+@pytest.mark.parametrize("text, sections", [
+    ("Jane Doe\n\nExperience\nEngineer, Acme, 2019-2020\n\nSkills: Python, SQL",
+     {"header": "Jane Doe", "experience": "Engineer, Acme, 2019-2020", "skills": "Python, SQL"}),
+    # Label lines inside an entry belong to the entry
+    ("Experience\nEngineer, Acme, 2019-2020\nTools: Java, Spring\nSummary: led a team",
+     {"experience": "Engineer, Acme, 2019-2020\nTools: Java, Spring\nSummary: led a team"}),
+    # Consecutive label lines at the top of a block are all headings
+    ("Jane Doe\n\nSkills: Python\nLanguages: English, German",
+     {"header": "Jane Doe", "skills": "Python", "languages": "English, German"}),
+    ("Jane Doe\nPROFESSIONAL EXPERIENCE\nEngineer\n• Technical Skills\nPython",
+     {"header": "Jane Doe", "experience": "Engineer", "skills": "Python"}),
+])
+def test_split_sections(text, sections):
+    assert split_sections(text) == sections
+
+
+def test_label_line_inside_a_job_keeps_the_next_job(stub_llm):
+    stub_llm(section_reply)
+    cv = long_cv()
+    assert len(cv) >= agents.SECTION_EXTRACTION_THRESHOLD
+
+    result = agents.agent1_extractor(cv)
+
+    assert [job["company"] for job in result["employment_details"]] == ["Acme Corp", "Beta Ltd"]
+    skills = {skill for group in result["technical_skills"] for skill in group["skills"]}
+    assert not any("Beta" in skill or "Engineer" in skill for skill in skills)
+
+
+def test_chunk_section_cuts_at_blank_lines():
+    entries = [f"Entry {index}\nline a\nline b" for index in range(6)]
+    text = "\n\n".join(entries)
+
+    chunks = chunk_section(text, 60)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    # No entry is split across chunks
+    assert sorted(chunk for joined in chunks for chunk in joined.split("\n\n")) == sorted(entries)
+
+
+def test_chunk_section_keeps_short_text_whole():
+    assert chunk_section("Python\nSQL", 100) == ["Python\nSQL"]
+
+
+def test_merge_extraction_results_deduplicates_entries():
+    job = {"title": "Engineer", "company": "Acme", "start_date": "2019", "end_date": None,
+           "location": None, "description": None}
+    partials = [
+        {"full_name": "Jane Doe", "email": None},
+        {"full_name": "J. Doe", "employment_details": [job]},
+        # The same job from an overlapping chunk, differently cased
+        {"employment_details": [{**job, "company": " ACME ", "description": "Built things"}]},
+        {"technical_skills": [{"category": "Cloud", "skills": ["Docker", "AWS"]}],
+         "soft_skills": ["Teamwork"], "additional_information": "Speaker."},
+        {"technical_skills": [{"category": "cloud", "skills": ["docker", "Kubernetes"]}],
+         "soft_skills": ["teamwork", "Mentoring"], "additional_information": "Speaker."},
+    ]
+
+    merged = agents.merge_extraction_results(partials)
+
+    assert set(merged) == set(agents.SECTION_FIELD_SCHEMAS)
+    assert merged["full_name"] == "Jane Doe"
+    assert merged["employment_details"] == [job]
+    assert merged["technical_skills"] == [{"category": "Cloud", "skills": ["Docker", "AWS", "Kubernetes"]}]
+    assert merged["soft_skills"] == ["Teamwork", "Mentoring"]
+    assert merged["additional_information"] == "Speaker."
+    assert merged["education"] is None
+
+
+@pytest.mark.parametrize("first, second, same", [
+    ({"title": "Engineer", "company": "Acme", "start_date": "2019"},
+     {"title": "engineer", "company": "ACME ", "start_date": "2019", "location": "Berlin"}, True),
+    ({"title": "Engineer", "company": "Acme", "start_date": "2019"},
+     {"title": "Engineer", "company": "Acme", "start_date": "2021"}, False),
+    # Entries without any key field fall back to comparing the whole entry
+    ({"title": None, "company": None, "start_date": None, "description": "a"},
+     {"title": None, "company": None, "start_date": None, "description": "b"}, False),
+])
+def test_entry_key(first, second, same):
+    assert (agents._entry_key("employment_details", first) == agents._entry_key("employment_details", second)) == same
+
+
+FULL_EXTRACTION = json.dumps({"full_name": "Single Call", "employment_details": [{"company": "Acme Corp"}]})
+
+
+def test_short_cv_uses_a_single_call(stub_llm):
+    server = stub_llm(lambda model, body: (FULL_EXTRACTION, 0, 200))
+
+    result = agents.agent1_extractor("Jane Doe\n\nExperience\nEngineer, Acme Corp, 2019-present\n\nSkills\nGo")
+
+    assert result["full_name"] == "Single Call"
+    assert len(server.calls) == 1
+
+
+def test_long_cv_is_extracted_by_section(stub_llm):
+    server = stub_llm(section_reply)
+
+    result = agents.agent1_extractor(long_cv())
+
+    assert result["full_name"] == "Jane Doe"
+    # header, experience, education, skills and publication chunks
+    assert len(server.calls) > 4
+
+
+def test_failed_section_falls_back_to_a_single_call(stub_llm):
+    def reply(model, body):
+        system = body["messages"][0]["content"]
+        if "MUST contain these keys exactly" in system:
+            return FULL_EXTRACTION, 0, 200
+        if "the Education section" in system or "Fix this JSON" in body["messages"][-1]["content"]:
+            return "Sorry, I cannot help with that.", 0, 200
+        return section_reply(model, body)
+    stub_llm(reply)
+
+    result = agents.agent1_extractor(long_cv())
+
+    assert result["full_name"] == "Single Call"
+    assert result["employment_details"][0]["company"] == "Acme Corp"
@@ -0,0 +1,93 @@
+import pytest
+
+from src.services.skill_matcher import SkillMatcher, get_skill_matcher
+
+
+TAXONOMY = {
+    "lookup_only": ["C", "Go", "Spring"],
+    "categories": {
+        "Programming Languages": {
+            "C": ["C"],
+            "C++": ["c++", "cpp"],
+            "C#": ["c#", "csharp"],
+            "Go": ["Go", "golang"],
+            "Java": ["java"],
+            "JavaScript": ["javascript", "js"],
+        },
+        "Frameworks": {
+            "Spring": ["Spring"],
+            "Spring Boot": ["spring boot", "springboot"],
+        },
+        "Cloud & DevOps": {
+            "Kubernetes": ["k8s"],
+            "Google Cloud": ["google cloud", "google cloud platform", "gcp"],
+        },
+    },
+}
+
+
+@pytest.fixture
+def matcher():
+    return SkillMatcher(TAXONOMY)
+
+
+@pytest.mark.parametrize("text, skills", [
+    # Longest alias at a position wins
+    ("Java and JavaScript", ["Java", "JavaScript"]),
+    ("Google Cloud Platform, Spring Boot", ["Google Cloud", "Spring Boot"]),
+    ("google  cloud\nplatform", ["Google Cloud"]),
+    ("C++, C# and cpp", ["C++", "C#"]),
+    # No matches inside words or glued to + / #
+    ("javanese k8sx xjs", []),
+    ("C++", ["C++"]),
+    # Lookup-only aliases are ordinary words in free text
+    ("C. Smith, Go team, Spring 2020 semester", []),
+    ("golang, K8S", ["Go", "Kubernetes"]),
+])
+def test_scan(matcher, text, skills):
+    assert matcher.scan(text) == skills
+
+
+@pytest.mark.parametrize("alias, canonical", [
+    ("C", "C"), ("go", "Go"), ("  Spring ", "Spring"), ("K8s", "Kubernetes"), ("Cobol", None),
+])
+def test_canonicalize_includes_lookup_only_aliases(matcher, alias, canonical):
+    assert matcher.canonicalize(alias) == canonical
+
+
+def test_normalize_extraction_regroups_and_keeps_proficiency(matcher):
+    extraction = {
+        "programming_languages": [{"language": "golang", "proficiency": "expert"}, "Java"],
+        "technical_skills": [
+            {"category": "Tools", "skills": ["k8s", "Go", "Terraform", "kubernetes"]},
+            {"category": None, "skills": ["CSharp", "GCP"]},
+        ],
+    }
+
+    result = matcher.normalize_extraction(extraction, "Skills: Spring Boot, JavaScript, Terraform")
+
+    assert result["programming_languages"] == [
+        {"language": "Go", "proficiency": "expert"},
+        {"language": "Java", "proficiency": None},
+        {"language": "C#", "proficiency": None},
+        {"language": "JavaScript", "proficiency": None},
+    ]
+    assert result["technical_skills"] == [
+        {"category": "Cloud & DevOps", "skills": ["Kubernetes", "Google Cloud"]},
+        {"category": "Tools", "skills": ["Terraform"]},
+        {"category": "Frameworks", "skills": ["Spring Boot"]},
+    ]
+
+
+def test_normalize_extraction_without_skills(matcher):
+    result = matcher.normalize_extraction({"technical_skills": None, "programming_languages": None})
+
+    assert result["technical_skills"] is None
+    assert result["programming_languages"] is None
+
+
+def test_bundled_taxonomy_compiles():
+    matcher = get_skill_matcher()
+
+    assert matcher.scan("Python, Docker and Kubernetes") == ["Python", "Docker", "Kubernetes"]
+    assert matcher.scan("Julia Roberts, R. Smith, Go team") == []